@@ -16,8 +16,10 @@ from datetime import datetime
 from pathlib import Path
 from typing import Union
 
+from .paths import ROOT_CONFIG
 
-DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[1] / "organizer.config.json"
+
+DEFAULT_CONFIG_PATH = ROOT_CONFIG
 
 
 def setup_logging(config_path: Union[str, Path] = DEFAULT_CONFIG_PATH) -> Path:
@@ -16,18 +16,21 @@ Configuration example (save as organizer.config.json):
   "base_dir": "C:/cat",
   "embedding_model": "nomic-ai/nomic-embed-text-v1.5",
   "search": { "top_k": 10, "score_round": 4 },
-  "sqlite": { "wal": true, "synchronous": "NORMAL", "cache_size_mb": 64, "temp_store_memory": true }
+  "sqlite": { "wal": true, "synchronous": "NORMAL", "cache_size_mb": 64, "temp_store_memory": true,
+              "mmap_size_mb": 256 }
 }
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
 import re
 import threading
+from collections import OrderedDict
 from contextlib import nullcontext
-from functools import wraps
+from functools import lru_cache, wraps
 from pathlib import Path
 import time
 from datetime import datetime, timezone
@@ -46,6 +49,11 @@ import numpy as np
 import sqlite_vec
 from fastembed import TextEmbedding
 
+try:  # optional: faster keys for the embedding cache
+    import xxhash
+except ImportError:  # pragma: no cover - depends on installed extras
+    xxhash = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,8 +68,12 @@ def _norm_rel(path: str) -> str:
     return os.path.normpath(p).replace("\\", "/")
 
 
+class UnknownFileError(KeyError):
+    """Raised when a path or file id is not present in the ``files`` table."""
+
+
 def _friendly_error(err: Exception) -> dict:
-    return {"ok": False, "error": str(err)}
+    return {"ok": False, "error": str(err), "error_type": type(err).__name__}
 
 
 def _safe_json(fn):
@@ -91,7 +103,17 @@ DEFAULT_CONFIG = {
     "instructions": "",
     # Use a concrete model string; fastembed expects a string, not None
     "embedding_model": "nomic-ai/nomic-embed-text-v1.5",
-    "search": {"top_k": 10, "score_round": 4},
+    # ``vector_type`` "int8" stores quantised embeddings (4x smaller than
+    # "float32"); switching it rebuilds the vector tables on the next start.
+    # ``embedding_cache_size`` vectors are memoised by text; 0 disables it.
+    # ``embed_batch_size`` caps how many texts go to the model per call.
+    "search": {
+        "top_k": 10,
+        "score_round": 4,
+        "vector_type": "int8",
+        "embedding_cache_size": 4096,
+        "embed_batch_size": 64,
+    },
     "log_dir": ".",
     "allowed_file_extentions": [
         ".txt",
@@ -125,12 +147,135 @@ DEFAULT_CONFIG = {
         "synchronous": "NORMAL",
         "cache_size_mb": 64,
         "temp_store_memory": True,
+        "mmap_size_mb": 256,
     },
 }
 
 # Placeholder markers used when a file analysis is in progress.
 PROCESSING_SENTINELS = ("processing...", "processing..")
 
+# Prepared statements kept per connection; sqlite3 keys them by SQL text, so
+# hot queries shared by several methods live in constants below.
+STATEMENT_CACHE_SIZE = 256
+_SQL_ID_BY_PATH = "SELECT id FROM files WHERE path_rel=?"
+# Id lists are bound as one JSON array so the SQL text, and with it the cached
+# statement, is the same however many ids are passed.
+_SQL_IDS_IN = "id IN (SELECT value FROM json_each(?))"
+_SQL_SET_SELECTED_BY_IDS = (
+    f"UPDATE files SET selected=?, updated_at=? WHERE {_SQL_IDS_IN} RETURNING id"
+)
+# Appends one note line to every listed row, starting it on a new line when
+# the existing notes do not end with one, and returns the merged notes.
+_SQL_NOTES_WITH_APPENDED_BY_IDS = """
+    SELECT id, path_rel, organization_notes, CASE
+            WHEN organization_notes IS NULL OR organization_notes = '' THEN ?1
+            WHEN substr(organization_notes, -1) = char(10) THEN organization_notes || ?1
+            ELSE organization_notes || char(10) || ?1
+        END AS appended
+    FROM files
+    WHERE id IN (SELECT value FROM json_each(?2))
+"""
+# Only replaces notes still as they were read, so a concurrent append is not lost.
+_SQL_REPLACE_NOTES_IF_UNCHANGED = (
+    "UPDATE files SET organization_notes=?, updated_at=? WHERE id=? AND organization_notes IS ?"
+)
+_SQL_DELETE_NOTE_VECTORS_BY_IDS = (
+    "DELETE FROM vec_org_notes WHERE file_id IN (SELECT value FROM json_each(?))"
+)
+_SQL_DELETE_REPORT_VECTORS_BY_IDS = (
+    "DELETE FROM vec_file_report WHERE file_id IN (SELECT value FROM json_each(?))"
+)
+_SQL_IDS_BY_PATHS = "SELECT id, path_rel FROM files WHERE path_rel IN (SELECT value FROM json_each(?))"
+
+# Columns of ``files`` mirrored into the ``files_fts`` search index.
+FTS_COLUMNS = "path_rel, file_report, organization_notes, planned_dest, final_dest"
+# The trigram tokenizer cannot match anything shorter than this.
+FTS_MIN_QUERY_LENGTH = 3
+
+# Work-queue filters behind the ``get_next_path_*`` lookups. Each backs a
+# partial index holding only the matching rows, so finding the next file does
+# not walk past every finished one. SQLite only picks a partial index when the
+# query repeats its WHERE terms verbatim, hence the shared strings.
+_SENTINEL_LIST = ", ".join("'" + s.replace("'", "''") + "'" for s in PROCESSING_SENTINELS)
+_PENDING_FILTERS = {
+    "files_pending_report": (
+        "selected=1 AND (IFNULL(TRIM(file_report),'')='' "
+        f"OR file_report IN ({_SENTINEL_LIST}))"
+    ),
+    "files_pending_plan": (
+        "selected=1 AND IFNULL(TRIM(file_report),'')<>'' AND planner_processed=0"
+    ),
+    "files_pending_planned_dest": (
+        "selected=1 AND IFNULL(TRIM(file_report),'')<>'' AND planner_processed=1 "
+        "AND IFNULL(TRIM(planned_dest),'')=''"
+    ),
+    "files_pending_final_dest": (
+        "selected=1 AND IFNULL(TRIM(planned_dest),'')<>'' "
+        "AND IFNULL(TRIM(final_dest),'')=''"
+    ),
+}
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of index-ready embeddings keyed by a digest of their text.
+
+    Keys are 128-bit XXH3 integers when :mod:`xxhash` is installed and 16-byte
+    BLAKE2b digests otherwise. Either is ample for a few thousand entries and
+    cheaper to compute than SHA-256.
+    Cached vectors are read-only because every hit shares the same array.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int | bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> int | bytes:
+        data = text.encode("utf-8")
+        if xxhash is not None:
+            return xxhash.xxh3_128_intdigest(data)
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = self._key(text)
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is not None:
+                self._entries.move_to_end(key)
+            return vec
+
+    def put(self, text: str, vec: np.ndarray) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self._key(text)
+        vec.flags.writeable = False
+        with self._lock:
+            self._entries[key] = vec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=4)
+def _shared_embedder(factory: T.Callable[..., T.Any], model_name: str) -> T.Any:
+    return factory(model_name=model_name)
+
+
+def get_embedder(model_name: str) -> T.Any:
+    """Return the process-wide embedding model for ``model_name``.
+
+    Loading a FastEmbed model reads its weights and builds an ONNX session, so
+    every :class:`AgentVectorDB` (and every reload of a module creating one)
+    reuses the first instance. ``TextEmbedding`` is looked up on each call and
+    is part of the cache key, so patching it swaps in a new model.
+    """
+
+    return _shared_embedder(TextEmbedding, model_name)
+
 
 def _normalise_extensions(values: T.Iterable[str] | None) -> set[str]:
     """Return a normalised set of file extensions."""
@@ -160,11 +305,46 @@ class AgentVectorDB:
             self.config.get("allowed_file_extentions", [])
         )
         self._lock = threading.RLock()
+        self._readers = threading.local()
+        # Every open reader connection, mapped to the thread it serves (or
+        # ``None`` for :meth:`iter_rows` streams), so :meth:`close` reaches all.
+        self._reader_conns: dict[sqlite3.Connection, threading.Thread | None] = {}
+        self._reader_conns_lock = threading.Lock()
         self.conn = self._connect_and_load_vec()
 
         # --- FastEmbed model (ensure a non-empty string) ---
         model_name = self.config.get("embedding_model") or "nomic-ai/nomic-embed-text-v1.5"
-        self.embedder = TextEmbedding(model_name=model_name)
+        self.embedder = get_embedder(model_name)
+        self._embedding_cache = EmbeddingCache(
+            int(self.config.get("search", {}).get("embedding_cache_size", 4096))
+        )
+        self._embed_batch_size = max(
+            1, int(self.config.get("search", {}).get("embed_batch_size", 64))
+        )
+
+        self._vec_type = (
+            "int8" if self.config.get("search", {}).get("vector_type", "int8") == "int8" else "float32"
+        )
+        # SQL placeholder binding an embedding blob of the table's element type.
+        self._vec_param = "vec_int8(?)" if self._vec_type == "int8" else "?"
+        # Vector writes are formatted once so every call passes the same SQL
+        # text and hits the connection's prepared statement cache.
+        self._sql_add_report_vec = (
+            f"INSERT INTO vec_file_report(file_id, embedding, path_rel) VALUES(?, {self._vec_param}, ?)"
+        )
+        self._sql_add_note_vec = (
+            f"INSERT INTO vec_org_notes(file_id, embedding, path_rel) VALUES(?, {self._vec_param}, ?)"
+        )
+        # k-nearest-neighbour lookup answered by the vec0 index, which then
+        # drives primary-key lookups into ``files``.
+        self._sql_similar_reports = f"""
+        SELECT f.*, v.distance
+        FROM vec_file_report v
+        JOIN files f ON f.id = v.file_id
+        WHERE v.embedding MATCH {self._vec_param.replace("?", ":q")} AND k = :k
+        ORDER BY v.distance
+        LIMIT :k
+        """
 
         self._prefix = "passage: "
         # embed() returns a generator; take the first vector to determine dimension
@@ -237,14 +417,23 @@ class AgentVectorDB:
 
         merged = deep_merge(DEFAULT_CONFIG, cfg)
         db_path = merged.get("db_path", DEFAULT_CONFIG["db_path"])
-        if db_path and not os.path.isabs(db_path):
+        if db_path and db_path != ":memory:" and not os.path.isabs(db_path):
             merged["db_path"] = os.path.abspath(os.path.join(os.path.dirname(path), db_path))
         return merged
 
     def _connect_and_load_vec(self) -> sqlite3.Connection:
         # Allow use across FastAPI worker threads and avoid “created in a different thread”
-        db = sqlite3.connect(self.config["db_path"], check_same_thread=False)
+        db = sqlite3.connect(
+            self.config["db_path"],
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
         db.row_factory = sqlite3.Row
+        self._configure_connection(db)
+        return db
+
+    def _configure_connection(self, db: sqlite3.Connection) -> None:
+        """Apply the configured PRAGMAs and load sqlite-vec on ``db``."""
 
         # Be kinder under concurrent access
         db.execute("PRAGMA busy_timeout=5000")
@@ -261,12 +450,160 @@ class AgentVectorDB:
             db.execute("PRAGMA temp_store=MEMORY")
         cache_mb = int(s.get("cache_size_mb", 64))
         db.execute(f"PRAGMA cache_size={-cache_mb * 1024}")
+        mmap_mb = int(s.get("mmap_size_mb", 256))
+        db.execute(f"PRAGMA mmap_size={mmap_mb * 1024 * 1024}")
         db.execute("PRAGMA foreign_keys=ON")
 
         db.enable_load_extension(True)
         sqlite_vec.load(db)
         db.enable_load_extension(False)
-        return db
+
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read-only connection, opening it on first use.
+
+        Readers bypass :attr:`_lock` and the shared :attr:`conn`, so under WAL
+        they run concurrently with each other and with the writer. An
+        in-memory database exists only inside :attr:`conn`, so reads go there.
+        """
+
+        if self.config["db_path"] == ":memory:":
+            return self.conn
+        reader = getattr(self._readers, "conn", None)
+        if reader is None:
+            reader = self._open_reader(threading.current_thread())
+            self._readers.conn = reader
+        return reader
+
+    def _open_reader(self, owner: threading.Thread | None = None) -> sqlite3.Connection:
+        """Open a query-only connection and record it for :meth:`close`.
+
+        Readers left behind by threads that have since exited are closed here,
+        so a churn of short-lived threads does not accumulate connections.
+        """
+
+        reader = sqlite3.connect(
+            self.config["db_path"],
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        reader.row_factory = sqlite3.Row
+        self._configure_connection(reader)
+        reader.execute("PRAGMA query_only=ON")
+        with self._reader_conns_lock:
+            stale = [
+                conn
+                for conn, thread in self._reader_conns.items()
+                if thread is not None and not thread.is_alive()
+            ]
+            for conn in stale:
+                del self._reader_conns[conn]
+                conn.close()
+            self._reader_conns[reader] = owner
+        return reader
+
+    def _close_reader(self, reader: sqlite3.Connection) -> None:
+        with self._reader_conns_lock:
+            self._reader_conns.pop(reader, None)
+        reader.close()
+
+    def close(self) -> None:
+        """Close the writer connection and every reader opened by this instance."""
+
+        with self._reader_conns_lock:
+            readers = list(self._reader_conns)
+            self._reader_conns.clear()
+        for reader in readers:
+            reader.close()
+        with self._lock:
+            self.conn.close()
+
+    def iter_rows(
+        self, sql: str, params: T.Any = (), batch_size: int = 500
+    ) -> T.Iterator[sqlite3.Row]:
+        """Yield the rows of a read-only query without materialising them all.
+
+        The query runs on a connection of its own, closed once the iterator is
+        exhausted or discarded, so it may be advanced from different threads.
+        In-memory databases are read through :attr:`conn` instead.
+
+        Parameters
+        ----------
+        sql:
+            ``SELECT`` statement to execute.
+        params:
+            Positional or named parameters bound to ``sql``.
+        batch_size:
+            Rows fetched from SQLite at a time.
+
+        Yields
+        ------
+        sqlite3.Row
+            Each matching row.
+        """
+
+        in_memory = self.config["db_path"] == ":memory:"
+        reader = self.conn if in_memory else self._open_reader()
+        try:
+            cursor = reader.execute(sql, params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            if not in_memory:
+                self._close_reader(reader)
+
+    def fetch_all(self, sql: str, params: T.Any = ()) -> list[sqlite3.Row]:
+        """Run a read-only query on the calling thread's reader connection.
+
+        Parameters
+        ----------
+        sql:
+            ``SELECT`` statement to execute.
+        params:
+            Positional or named parameters bound to ``sql``.
+
+        Returns
+        -------
+        list[sqlite3.Row]
+            All matching rows.
+        """
+
+        return self._reader().execute(sql, params).fetchall()
+
+    def fetch_one(self, sql: str, params: T.Any = ()) -> sqlite3.Row | None:
+        """Like :meth:`fetch_all` but return only the first row, if any."""
+
+        return self._reader().execute(sql, params).fetchone()
+
+    def data_version(self) -> tuple[int, int] | None:
+        """Return a token that changes whenever the database file changes.
+
+        ``total_changes`` of :attr:`conn` counts rows written through this
+        instance, and ``PRAGMA data_version`` on the same connection changes
+        when any other connection commits, including other
+        :class:`AgentVectorDB` instances in this process and other processes.
+
+        The call never waits for :attr:`_lock`, so it is safe on an event loop
+        while a long write, such as embedding a batch, is in progress.
+
+        Returns
+        -------
+        tuple or None
+            The token, or ``None`` while a write holds :attr:`_lock` or
+            :attr:`conn` has uncommitted changes that readers cannot see yet.
+        """
+
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self.conn.in_transaction:
+                return None
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            return self.conn.total_changes, int(version)
+        finally:
+            self._lock.release()
 
     def _ensure_schema(self) -> None:
         c = self.conn
@@ -289,6 +626,8 @@ class AgentVectorDB:
               key TEXT PRIMARY KEY,
               value TEXT NOT NULL
             );
+            CREATE INDEX IF NOT EXISTS files_updated_id ON files(updated_at, id);
+            CREATE INDEX IF NOT EXISTS files_created_id ON files(created_at, id);
             """
         )
         cols = {r["name"] for r in c.execute("PRAGMA table_info(files)")}
@@ -300,32 +639,20 @@ class AgentVectorDB:
             c.execute(
                 "ALTER TABLE files ADD COLUMN selected INTEGER NOT NULL DEFAULT 1"
             )
+        # The partial indexes filter on the migrated columns, so they come after.
+        for index_name, where in _PENDING_FILTERS.items():
+            c.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON files(id) WHERE {where}")
         exists_vec_fr = c.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name='vec_file_report'"
         ).fetchone()
         if not exists_vec_fr:
-            c.executescript(
-                f"""
-                CREATE VIRTUAL TABLE vec_file_report USING vec0(
-                  file_id INTEGER PRIMARY KEY,
-                  embedding FLOAT[{self._dim}] distance_metric=cosine,
-                  +path_rel TEXT
-                );
-                """
-            )
+            c.executescript(self._vec_table_sql("vec_file_report"))
         exists_vec_on = c.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name='vec_org_notes'"
         ).fetchone()
         if not exists_vec_on:
-            c.executescript(
-                f"""
-                CREATE VIRTUAL TABLE vec_org_notes USING vec0(
-                  file_id INTEGER PRIMARY KEY,
-                  embedding FLOAT[{self._dim}] distance_metric=cosine,
-                  +path_rel TEXT
-                );
-                """
-            )
+            c.executescript(self._vec_table_sql("vec_org_notes"))
+        self.has_fts = self._ensure_fts()
         row = c.execute("SELECT value FROM config WHERE key='base_dir'").fetchone()
         if not row:
             c.execute(
@@ -341,8 +668,66 @@ class AgentVectorDB:
                 )
         c.commit()
 
+    def _ensure_fts(self) -> bool:
+        """Create the ``files_fts`` full-text index over ``files`` if possible.
+
+        The index uses FTS5's trigram tokenizer so that ``MATCH`` finds
+        case-insensitive substrings, the same results as the ``LIKE '%q%'``
+        search it replaces. Triggers keep it in sync with ``files``; an
+        existing database is indexed once when the table is first created.
+
+        Returns
+        -------
+        bool
+            ``False`` when this SQLite build lacks FTS5 or the trigram
+            tokenizer, in which case callers should fall back to ``LIKE``.
+        """
+
+        c = self.conn
+        exists = c.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='files_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            c.execute(
+                f"""
+                CREATE VIRTUAL TABLE files_fts USING fts5(
+                  {FTS_COLUMNS},
+                  content='files', content_rowid='id', tokenize='trigram'
+                )
+                """
+            )
+        except sqlite3.OperationalError as exc:
+            logger.warning("Full-text search unavailable (%s); using LIKE filters", exc)
+            return False
+        new_cols = ", ".join(f"new.{col}" for col in FTS_COLUMNS.split(", "))
+        old_cols = ", ".join(f"old.{col}" for col in FTS_COLUMNS.split(", "))
+        c.executescript(
+            f"""
+            CREATE TRIGGER files_fts_ai AFTER INSERT ON files BEGIN
+              INSERT INTO files_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, {new_cols});
+            END;
+            CREATE TRIGGER files_fts_ad AFTER DELETE ON files BEGIN
+              INSERT INTO files_fts(files_fts, rowid, {FTS_COLUMNS})
+              VALUES ('delete', old.id, {old_cols});
+            END;
+            CREATE TRIGGER files_fts_au AFTER UPDATE OF {FTS_COLUMNS} ON files BEGIN
+              INSERT INTO files_fts(files_fts, rowid, {FTS_COLUMNS})
+              VALUES ('delete', old.id, {old_cols});
+              INSERT INTO files_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, {new_cols});
+            END;
+            INSERT INTO files_fts(files_fts) VALUES ('rebuild');
+            """
+        )
+        return True
+
     def _ensure_vector_table_dimensions(self) -> None:
-        """Ensure vector tables match the current embedding dimensionality."""
+        """Ensure vector tables match the current embedding dimensionality.
+
+        Tables whose element type differs from ``search.vector_type`` are
+        rebuilt the same way, re-embedding the stored texts.
+        """
 
         with self._lock:
             existing_dim = self._get_stored_embedding_dim()
@@ -353,6 +738,13 @@ class AgentVectorDB:
                 dim is not None and dim != self._dim
                 for dim in (existing_dim, vec_file_dim, vec_notes_dim)
             )
+            type_mismatch = any(
+                vec_type is not None and vec_type != self._vec_type
+                for vec_type in (
+                    self._get_vec_table_type("vec_file_report"),
+                    self._get_vec_table_type("vec_org_notes"),
+                )
+            )
 
             if mismatch:
                 logger.warning(
@@ -364,6 +756,12 @@ class AgentVectorDB:
                     self._dim,
                 )
                 self._rebuild_vector_tables()
+            elif type_mismatch:
+                logger.warning(
+                    "Vector storage type changed to %s. Rebuilding vector tables.",
+                    self._vec_type,
+                )
+                self._rebuild_vector_tables()
 
             self._set_stored_embedding_dim(self._dim)
 
@@ -374,9 +772,21 @@ class AgentVectorDB:
         ).fetchone()
         if not row or not row["sql"]:
             return None
-        match = re.search(r"FLOAT\[(\d+)\]", row["sql"])
+        match = re.search(r"(?:FLOAT|INT8)\[(\d+)\]", row["sql"], re.IGNORECASE)
         return int(match.group(1)) if match else None
 
+    def _get_vec_table_type(self, table_name: str) -> str | None:
+        row = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name=?",
+            (table_name,),
+        ).fetchone()
+        if not row or not row["sql"]:
+            return None
+        match = re.search(r"\b(FLOAT|INT8)\[", row["sql"], re.IGNORECASE)
+        if not match:
+            return None
+        return "int8" if match.group(1).upper() == "INT8" else "float32"
+
     def _get_stored_embedding_dim(self) -> int | None:
         row = self.conn.execute(
             "SELECT value FROM config WHERE key='embedding_dim'",
@@ -407,48 +817,58 @@ class AgentVectorDB:
             """
         )
         c.executescript(
-            f"""
-            CREATE VIRTUAL TABLE vec_file_report USING vec0(
-              file_id INTEGER PRIMARY KEY,
-              embedding FLOAT[{self._dim}] distance_metric=cosine,
-              +path_rel TEXT
-            );
-            CREATE VIRTUAL TABLE vec_org_notes USING vec0(
-              file_id INTEGER PRIMARY KEY,
-              embedding FLOAT[{self._dim}] distance_metric=cosine,
-              +path_rel TEXT
-            );
-            """
+            self._vec_table_sql("vec_file_report") + self._vec_table_sql("vec_org_notes")
         )
 
         rows = c.execute(
             "SELECT id, path_rel, file_report FROM files WHERE IFNULL(TRIM(file_report),'')<>''",
         ).fetchall()
-        for row in rows:
-            try:
-                emb = self._embed_doc(row["file_report"])
-            except Exception:  # pylint: disable=broad-except
-                continue
-            c.execute(
-                "INSERT INTO vec_file_report(file_id, embedding, path_rel) VALUES(?, ?, ?)",
-                (int(row["id"]), emb, row["path_rel"]),
-            )
+        c.executemany(
+            self._sql_add_report_vec,
+            (
+                (int(row["id"]), emb, row["path_rel"])
+                for row, emb in self._embed_rows(rows, "file_report")
+            ),
+        )
 
         rows = c.execute(
             "SELECT id, path_rel, organization_notes FROM files WHERE IFNULL(TRIM(organization_notes),'')<>''",
         ).fetchall()
-        for row in rows:
-            try:
-                emb = self._embed_doc(row["organization_notes"])
-            except Exception:  # pylint: disable=broad-except
-                continue
-            c.execute(
-                "INSERT INTO vec_org_notes(file_id, embedding, path_rel) VALUES(?, ?, ?)",
-                (int(row["id"]), emb, row["path_rel"]),
-            )
+        c.executemany(
+            self._sql_add_note_vec,
+            (
+                (int(row["id"]), emb, row["path_rel"])
+                for row, emb in self._embed_rows(rows, "organization_notes")
+            ),
+        )
 
         c.commit()
 
+    def _embed_rows(
+        self, rows: list[sqlite3.Row], column: str
+    ) -> T.Iterator[tuple[sqlite3.Row, np.ndarray]]:
+        """Yield ``(row, vector)`` for the text in ``column`` of each row.
+
+        Texts are embedded a batch at a time. If a batch fails, its rows are
+        retried one by one so a single bad text only skips itself.
+        """
+
+        size = self._embed_batch_size
+        for start in range(0, len(rows), size):
+            chunk = rows[start : start + size]
+            try:
+                vectors = self._embed_docs([row[column] for row in chunk])
+            except Exception:  # pylint: disable=broad-except
+                vectors = []
+                for row in chunk:
+                    try:
+                        vectors.append(self._embed_doc(row[column]))
+                    except Exception:  # pylint: disable=broad-except
+                        vectors.append(None)
+            for row, vec in zip(chunk, vectors):
+                if vec is not None:
+                    yield row, vec
+
     @_safe_json
     def reset_db(self, base_dir_abs: str) -> dict:
         logger.info("Resetting database with base directory %s", base_dir_abs)
@@ -486,8 +906,12 @@ class AgentVectorDB:
             for key, value in self.config.items()
             if key not in CONFIG_FILE_EXCLUDE_KEYS
         }
-        with open(self.config_path, "w", encoding="utf-8") as f:
+        # Write beside the target and rename over it so readers never see a
+        # half-written file.
+        tmp_path = f"{self.config_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(persisted, f, indent=2)
+        os.replace(tmp_path, self.config_path)
 
     def _refresh_config_from_db(self) -> None:
         """Load persisted configuration values from SQLite into memory."""
@@ -560,12 +984,61 @@ class AgentVectorDB:
         )
         self.conn.commit()
         existed = cur.rowcount == 0
-        row = self.conn.execute("SELECT id FROM files WHERE path_rel=?", (path_rel,)).fetchone()
+        row = self.conn.execute(_SQL_ID_BY_PATH, (path_rel,)).fetchone()
         if not row:
             raise RuntimeError("Failed to insert row.")
         logger.info("Inserted path %s (existed=%s)", path_rel, existed)
         return {"ok": True, "id": int(row["id"]), "path_rel": path_rel, "existed": existed}
 
+    @_safe_json
+    def insert_many(self, paths_from_base: T.Iterable[str], with_ids: bool = False) -> dict:
+        """Insert several paths in a single transaction.
+
+        Paths with unsupported extensions are skipped rather than rejected, and
+        paths already present are left untouched.
+
+        Parameters
+        ----------
+        paths_from_base:
+            File paths relative to the base directory.
+        with_ids:
+            Also look up the row ids of the accepted paths, in one query.
+
+        Returns
+        -------
+        dict
+            JSON-friendly result with the number of new rows under ``inserted``
+            and of ignored paths under ``skipped``. With ``with_ids``, ``ids``
+            maps each accepted ``path_rel`` to its id.
+        """
+
+        now = _iso_now()
+        rows = []
+        skipped = 0
+        for path in paths_from_base:
+            path_rel = _norm_rel(path)
+            if not self.is_allowed_file(path_rel):
+                skipped += 1
+                continue
+            rows.append((path_rel, now, now))
+        if not rows:
+            result = {"ok": True, "inserted": 0, "skipped": skipped}
+            return {**result, "ids": {}} if with_ids else result
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO files(path_rel, selected, created_at, updated_at) VALUES (?, 1, ?, ?)",
+                rows,
+            )
+        inserted = int(cur.rowcount)
+        logger.info("Inserted %s of %s paths", inserted, len(rows))
+        result = {"ok": True, "inserted": inserted, "skipped": skipped}
+        if with_ids:
+            found = self.conn.execute(
+                _SQL_IDS_BY_PATHS, (json.dumps([row[0] for row in rows]),)
+            )
+            result["ids"] = {row["path_rel"]: int(row["id"]) for row in found}
+        return result
+
     @_safe_json
     def get_file_id(self, path_from_base: str) -> dict:
         """Return the database identifier for ``path_from_base``.
@@ -582,14 +1055,14 @@ class AgentVectorDB:
 
         Raises
         ------
-        KeyError
+        UnknownFileError
             If the path is not present in the database.
         """
 
         path_rel = _norm_rel(path_from_base)
-        row = self.conn.execute("SELECT id FROM files WHERE path_rel=?", (path_rel,)).fetchone()
+        row = self.conn.execute(_SQL_ID_BY_PATH, (path_rel,)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         return {"ok": True, "id": int(row["id"]), "path_rel": path_rel}
 
     @_safe_json
@@ -597,28 +1070,110 @@ class AgentVectorDB:
         if not text or not text.strip():
             raise ValueError("file_report text is empty.")
         path_rel = _norm_rel(path_from_base)
-        row = self.conn.execute("SELECT id FROM files WHERE path_rel=?", (path_rel,)).fetchone()
+        row = self.conn.execute(_SQL_ID_BY_PATH, (path_rel,)).fetchone()
+        if not row:
+            raise UnknownFileError(f"path not found: {path_rel}")
+        return self._write_file_report(int(row["id"]), path_rel, text)
+
+    @_safe_json
+    def set_file_report_by_id(self, file_id: int, text: str) -> dict:
+        """Like :meth:`set_file_report` but address the file by identifier.
+
+        Parameters
+        ----------
+        file_id:
+            Database identifier of the file.
+        text:
+            Report text to store and embed.
+
+        Returns
+        -------
+        dict
+            JSON-friendly result containing ``id`` and ``path_rel``.
+        """
+
+        if not text or not text.strip():
+            raise ValueError("file_report text is empty.")
+        row = self.conn.execute("SELECT path_rel FROM files WHERE id=?", (int(file_id),)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
-        file_id = int(row["id"])
+            raise UnknownFileError(f"file id not found: {file_id}")
+        return self._write_file_report(int(file_id), row["path_rel"], text)
+
+    @_safe_json
+    def set_file_reports(self, reports: T.Iterable[tuple[str, str]]) -> dict:
+        """Store several file reports in one transaction.
+
+        All texts are embedded in a single model call before the write, so
+        the database is locked only for the updates themselves.
+
+        Parameters
+        ----------
+        reports:
+            ``(path_from_base, text)`` pairs. A repeated path keeps its last
+            text.
+
+        Returns
+        -------
+        dict
+            JSON-friendly result where ``ids`` maps each stored ``path_rel`` to
+            its id and ``missing`` lists paths not present in the database.
+        """
+
+        by_path: dict[str, str] = {}
+        for path, text in reports:
+            if not text or not text.strip():
+                raise ValueError(f"file_report text is empty for: {path}")
+            by_path[_norm_rel(path)] = text
+        found = {
+            row["path_rel"]: int(row["id"])
+            for row in self.conn.execute(_SQL_IDS_BY_PATHS, (json.dumps(list(by_path)),))
+        }
+        rows = [(found[p], p, text) for p, text in by_path.items() if p in found]
+        self._write_file_reports(rows)
+        return {
+            "ok": True,
+            "ids": {path_rel: file_id for file_id, path_rel, _ in rows},
+            "missing": [p for p in by_path if p not in found],
+        }
+
+    def _write_file_report(self, file_id: int, path_rel: str, text: str) -> dict:
+        self._write_file_reports([(file_id, path_rel, text)])
+        return {"ok": True, "id": file_id, "path_rel": path_rel}
 
+    def _write_file_reports(self, rows: list[tuple[int, str, str]]) -> None:
+        """Persist ``(file_id, path_rel, text)`` reports and index their vectors."""
+
+        if not rows:
+            return
+        try:
+            embeddings = self._embed_docs([text for _, _, text in rows])
+        except Exception:  # pylint: disable=broad-except
+            # Even if embedding fails we still want the reports persisted.
+            logger.warning("Embedding %s file reports failed", len(rows), exc_info=True)
+            embeddings = None
+        now = _iso_now()
         attempts = 0
         while True:
             try:
-                self.conn.execute(
-                    "UPDATE files SET file_report=?, updated_at=? WHERE id=?",
-                    (text, _iso_now(), file_id),
-                )
-                try:
-                    emb = self._embed_doc(text)
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE files SET file_report=?, updated_at=? WHERE id=?",
+                        [(text, now, file_id) for file_id, _, text in rows],
+                    )
+                    # vec0 has no upsert, so stale vectors are always deleted
+                    # and the new ones inserted when embedding succeeded
                     self.conn.execute(
-                        "INSERT OR REPLACE INTO vec_file_report(file_id, embedding, path_rel) VALUES(?,?,?)",
-                        (file_id, emb, path_rel),
+                        _SQL_DELETE_REPORT_VECTORS_BY_IDS,
+                        (json.dumps([file_id for file_id, _, _ in rows]),),
                     )
-                except Exception:  # pylint: disable=broad-except
-                    # Even if embedding fails we still want the report persisted.
-                    pass
-                self.conn.commit()
+                    if embeddings is not None:
+                        self.conn.executemany(
+                            self._sql_add_report_vec,
+                            [
+                                (file_id, emb, path_rel)
+                                for (file_id, path_rel, _), emb in zip(rows, embeddings)
+                            ],
+                        )
                 break
             except sqlite3.OperationalError as exc:  # pragma: no cover - rare
                 if "locked" in str(exc).lower() and attempts < 3:
@@ -627,8 +1182,10 @@ class AgentVectorDB:
                     continue
                 raise
 
-        logger.info("Saved file report for %s", path_rel)
-        return {"ok": True, "id": file_id, "path_rel": path_rel}
+        if len(rows) == 1:
+            logger.info("Saved file report for %s", rows[0][1])
+        else:
+            logger.info("Saved %s file reports", len(rows))
 
     @_safe_json
     def clear_processing_file_reports(self) -> dict:
@@ -661,6 +1218,13 @@ class AgentVectorDB:
     ) -> dict:
         """Append timestamped organisation notes to the specified files.
 
+        The appended notes of all rows are read and embedded in one model call
+        before anything is written, so a failed embedding leaves the notes
+        untouched and the database is locked only for the updates and the
+        re-indexing, done in one transaction. Should another connection change
+        the notes in between, the append is rolled back and redone. Repeated
+        ids are updated once.
+
         Parameters
         ----------
         ids:
@@ -674,39 +1238,45 @@ class AgentVectorDB:
             JSON-friendly result containing ``updated_ids``.
         """
 
-        ids = [int(i) for i in ids]
+        ids = list(dict.fromkeys(int(i) for i in ids))
         if not ids:
             raise ValueError("No ids provided.")
         if not notes_to_append or not notes_to_append.strip():
             raise ValueError("organization_notes to append is empty.")
-        cur = self.conn.cursor()
         now = _iso_now()
-        updated: list[int] = []
         timestamp = datetime.now(timezone.utc).strftime("%d-%m-%y-%H:%M:%S")
         note_line = f"[{timestamp}]{notes_to_append.strip()}\n"
-        for file_id in ids:
-            row = cur.execute(
-                "SELECT organization_notes, path_rel FROM files WHERE id=?",
-                (file_id,),
-            ).fetchone()
-            if not row:
-                continue
-            merged = row["organization_notes"] or ""
-            if merged and not merged.endswith("\n"):
-                merged += "\n"
-            merged += note_line
-            cur.execute(
-                "UPDATE files SET organization_notes=?, updated_at=? WHERE id=?",
-                (merged, now, file_id),
-            )
-            emb = self._embed_doc(merged)
-            cur.execute("DELETE FROM vec_org_notes WHERE file_id=?", (file_id,))
-            cur.execute(
-                "INSERT INTO vec_org_notes(file_id, embedding, path_rel) VALUES(?, ?, ?)",
-                (file_id, emb, row["path_rel"]),
-            )
-            updated.append(file_id)
-        self.conn.commit()
+        ids_json = json.dumps(ids)
+        attempts = 0
+        while True:
+            found = {
+                int(row["id"]): row
+                for row in self.conn.execute(
+                    _SQL_NOTES_WITH_APPENDED_BY_IDS, (note_line, ids_json)
+                ).fetchall()
+            }
+            rows = [found[file_id] for file_id in ids if file_id in found]
+            updated = [int(row["id"]) for row in rows]
+            embeddings = self._embed_docs([row["appended"] for row in rows])
+            with self.conn:
+                replaced = self.conn.executemany(
+                    _SQL_REPLACE_NOTES_IF_UNCHANGED,
+                    [(row["appended"], now, row["id"], row["organization_notes"]) for row in rows],
+                ).rowcount
+                if replaced == len(rows):
+                    self.conn.execute(_SQL_DELETE_NOTE_VECTORS_BY_IDS, (ids_json,))
+                    self.conn.executemany(
+                        self._sql_add_note_vec,
+                        [
+                            (row["id"], emb, row["path_rel"])
+                            for row, emb in zip(rows, embeddings)
+                        ],
+                    )
+                    break
+                self.conn.rollback()
+            attempts += 1
+            if attempts >= 3:
+                raise RuntimeError("organization notes kept changing; append abandoned")
         logger.info("Appended organization notes to ids=%s", updated)
         return {"ok": True, "updated_ids": updated}
 
@@ -731,11 +1301,9 @@ class AgentVectorDB:
         """
 
         norm = _norm_rel(path_rel)
-        row = self.conn.execute(
-            "SELECT id FROM files WHERE path_rel=?", (norm,)
-        ).fetchone()
+        row = self.conn.execute(_SQL_ID_BY_PATH, (norm,)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {norm}")
+            raise UnknownFileError(f"path not found: {norm}")
         return self.append_organization_cluser_notes([int(row["id"])], notes_to_append)
 
     @_safe_json
@@ -766,7 +1334,7 @@ class AgentVectorDB:
             (path_rel,),
         ).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         existing = row["organization_notes"] or ""
         msg = message.strip()
         if msg in PROCESSING_SENTINELS:
@@ -783,7 +1351,7 @@ class AgentVectorDB:
         cur.execute("DELETE FROM vec_org_notes WHERE file_id=?", (int(row["id"]),))
         if emb is not None:
             cur.execute(
-                "INSERT INTO vec_org_notes(file_id, embedding, path_rel) VALUES(?, ?, ?)",
+                self._sql_add_note_vec,
                 (int(row["id"]), emb, path_rel),
             )
         self.conn.commit()
@@ -816,7 +1384,7 @@ class AgentVectorDB:
             (path_rel,),
         ).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         existing = row["organization_notes"] or ""
         parts = existing.splitlines(keepends=True)
         new_notes = existing
@@ -833,7 +1401,7 @@ class AgentVectorDB:
         if new_notes:
             emb = self._embed_doc(new_notes)
             cur.execute(
-                "INSERT INTO vec_org_notes(file_id, embedding, path_rel) VALUES(?, ?, ?)",
+                self._sql_add_note_vec,
                 (int(row["id"]), emb, path_rel),
             )
         self.conn.commit()
@@ -860,9 +1428,9 @@ class AgentVectorDB:
     def set_selected(self, path_from_base: str, selected: bool) -> dict:
         path_rel = _norm_rel(path_from_base)
         value = 1 if selected else 0
-        row = self.conn.execute("SELECT id FROM files WHERE path_rel=?", (path_rel,)).fetchone()
+        row = self.conn.execute(_SQL_ID_BY_PATH, (path_rel,)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         self.conn.execute(
             "UPDATE files SET selected=?, updated_at=? WHERE id=?",
             (value, _iso_now(), int(row["id"])),
@@ -874,17 +1442,21 @@ class AgentVectorDB:
     @_safe_json
     def set_selected_by_ids(self, ids: list[int], selected: bool) -> dict:
         if not ids:
-            return {"ok": True, "updated": 0, "selected": selected}
+            return {"ok": True, "updated": 0, "updated_ids": [], "selected": selected}
         value = 1 if selected else 0
-        placeholders = ",".join("?" for _ in ids)
-        now = _iso_now()
-        cur = self.conn.execute(
-            f"UPDATE files SET selected=?, updated_at=? WHERE id IN ({placeholders})",
-            (value, now, *ids),
-        )
+        rows = self.conn.execute(
+            _SQL_SET_SELECTED_BY_IDS,
+            (value, _iso_now(), json.dumps([int(i) for i in ids])),
+        ).fetchall()
         self.conn.commit()
-        logger.info("Updated selected=%s for %s rows", selected, cur.rowcount)
-        return {"ok": True, "updated": int(cur.rowcount), "selected": selected}
+        updated_ids = sorted(int(row["id"]) for row in rows)
+        logger.info("Updated selected=%s for %s rows", selected, len(updated_ids))
+        return {
+            "ok": True,
+            "updated": len(updated_ids),
+            "updated_ids": updated_ids,
+            "selected": selected,
+        }
 
     @_safe_json
     def set_selected_all(self, selected: bool) -> dict:
@@ -897,29 +1469,59 @@ class AgentVectorDB:
         logger.info("Updated selected=%s for all rows", selected)
         return {"ok": True, "updated": int(cur.rowcount), "selected": selected}
 
+    @_safe_json
+    def set_planned_destination_by_id(self, file_id: int, planned_dest: str) -> dict:
+        """Like :meth:`set_planned_destination` but address the file by identifier."""
+
+        planned_dest = _norm_rel(planned_dest)
+        path_rel = self._update_one_by_id("planned_dest", int(file_id), planned_dest)
+        logger.info("Set planned destination for %s -> %s", path_rel, planned_dest)
+        return {"ok": True, "id": int(file_id), "path_rel": path_rel, "planned_dest": planned_dest}
+
+    @_safe_json
+    def set_selected_by_id(self, file_id: int, selected: bool) -> dict:
+        """Like :meth:`set_selected` but address the file by identifier."""
+
+        value = 1 if selected else 0
+        path_rel = self._update_one_by_id("selected", int(file_id), value)
+        logger.info("Set selected=%s for %s", selected, path_rel)
+        return {"ok": True, "path_rel": path_rel, "selected": bool(value)}
+
+    def _update_one_by_id(self, col: str, file_id: int, value: T.Any) -> str:
+        """Update ``col`` for ``file_id`` and return the row's ``path_rel``."""
+
+        rows = self.conn.execute(
+            f"UPDATE files SET {col}=?, updated_at=? WHERE id=? RETURNING path_rel",
+            (value, _iso_now(), file_id),
+        ).fetchall()
+        self.conn.commit()
+        if not rows:
+            raise UnknownFileError(f"file id not found: {file_id}")
+        return rows[0]["path_rel"]
+
     def _update_one(self, col: str, path_rel: str, value: T.Any) -> None:
-        row = self.conn.execute("SELECT id FROM files WHERE path_rel=?", (path_rel,)).fetchone()
+        row = self.conn.execute(_SQL_ID_BY_PATH, (path_rel,)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         self.conn.execute(
             f"UPDATE files SET {col}=?, updated_at=? WHERE id=?",
             (value, _iso_now(), int(row["id"])),
         )
         self.conn.commit()
 
-    @_safe_json
-    def get_next_path_missing_file_report(self) -> dict:
+    def _next_pending(self, index_name: str) -> dict:
+        """Return the lowest-id file matching the ``index_name`` work-queue filter."""
+
         row = self.conn.execute(
-            """
-            SELECT path_rel FROM files
-            WHERE selected=1
-              AND (IFNULL(TRIM(file_report),'')='' OR file_report IN (?, ?))
-            ORDER BY id ASC LIMIT 1
-            """,
-            PROCESSING_SENTINELS,
+            f"SELECT path_rel FROM files WHERE {_PENDING_FILTERS[index_name]} "
+            "ORDER BY id ASC LIMIT 1"
         ).fetchone()
         return {"ok": True, "path_rel": row["path_rel"] if row else None}
 
+    @_safe_json
+    def get_next_path_missing_file_report(self) -> dict:
+        return self._next_pending("files_pending_report")
+
     @_safe_json
     def mark_organization_plan_processed(self, path_from_base: str) -> dict:
         """Mark that the planner has processed ``path_from_base``.
@@ -944,50 +1546,22 @@ class AgentVectorDB:
     def get_next_path_pending_organization_plan(self) -> dict:
         """Return the next file whose planner step has not run."""
 
-        row = self.conn.execute(
-            """
-            SELECT path_rel FROM files
-            WHERE selected=1
-              AND IFNULL(TRIM(file_report),'')<>''
-              AND planner_processed=0
-            ORDER BY id ASC LIMIT 1
-            """
-        ).fetchone()
-        return {"ok": True, "path_rel": row["path_rel"] if row else None}
+        return self._next_pending("files_pending_plan")
 
     @_safe_json
     def get_next_path_missing_planned_destination(self) -> dict:
-        row = self.conn.execute(
-            """
-            SELECT path_rel FROM files
-            WHERE selected=1
-              AND IFNULL(TRIM(file_report),'')<>''
-              AND planner_processed=1
-              AND IFNULL(TRIM(planned_dest),'')=''
-            ORDER BY id ASC LIMIT 1
-            """
-        ).fetchone()
-        return {"ok": True, "path_rel": row["path_rel"] if row else None}
+        return self._next_pending("files_pending_planned_dest")
 
     @_safe_json
     def get_next_path_missing_final_destination(self) -> dict:
-        row = self.conn.execute(
-            """
-            SELECT path_rel FROM files
-            WHERE selected=1
-              AND IFNULL(TRIM(planned_dest),'')<>''
-              AND IFNULL(TRIM(final_dest),'')=''
-            ORDER BY id ASC LIMIT 1
-            """
-        ).fetchone()
-        return {"ok": True, "path_rel": row["path_rel"] if row else None}
+        return self._next_pending("files_pending_final_dest")
 
     @_safe_json
     def get_file_report(self, path_from_base: str) -> dict:
         path_rel = _norm_rel(path_from_base)
         row = self.conn.execute("SELECT file_report FROM files WHERE path_rel=?", (path_rel,)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         return {"ok": True, "path_rel": path_rel, "file_report": row["file_report"]}
 
     @_safe_json
@@ -998,7 +1572,7 @@ class AgentVectorDB:
             (path_rel,),
         ).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
+            raise UnknownFileError(f"path not found: {path_rel}")
         return {
             "ok": True,
             "path_rel": path_rel,
@@ -1062,21 +1636,37 @@ class AgentVectorDB:
         path_rel = _norm_rel(path_from_base)
         row = self.conn.execute("SELECT id, file_report FROM files WHERE path_rel=?", (path_rel,)).fetchone()
         if not row:
-            raise KeyError(f"path not found: {path_rel}")
-        if not row["file_report"]:
+            raise UnknownFileError(f"path not found: {path_rel}")
+        return self._similar_file_reports(int(row["id"]), path_rel, row["file_report"], top_k)
+
+    @_safe_json
+    def find_similar_file_reports_by_id(self, file_id: int, top_k: int | None = None) -> dict:
+        """Like :meth:`find_similar_file_reports` but address the file by identifier."""
+
+        row = self.conn.execute(
+            "SELECT path_rel, file_report FROM files WHERE id=?", (int(file_id),)
+        ).fetchone()
+        if not row:
+            raise UnknownFileError(f"file id not found: {file_id}")
+        return self._similar_file_reports(int(file_id), row["path_rel"], row["file_report"], top_k)
+
+    def _similar_file_reports(
+        self, file_id: int, path_rel: str, file_report: str | None, top_k: int | None
+    ) -> dict:
+        if not file_report:
             raise ValueError(f"file_report is empty for: {path_rel}")
-        q_vec = self._embed_doc(row["file_report"])
+        # Reuse the report's indexed vector; only re-embed when none is stored.
+        stored = self.conn.execute(
+            "SELECT embedding FROM vec_file_report WHERE file_id=?",
+            (file_id,),
+        ).fetchone()
+        if stored is not None:
+            q_vec = stored["embedding"]
+        else:
+            q_vec = self._embed_doc(file_report)
         k = int(top_k or self.config.get("search", {}).get("top_k", 10))
         score_round = int(self.config.get("search", {}).get("score_round", 4))
-        sql = """
-        SELECT f.*, v.distance
-        FROM vec_file_report v
-        JOIN files f ON f.id = v.file_id
-        WHERE v.embedding MATCH :q AND k = :k
-        ORDER BY v.distance
-        LIMIT :k
-        """
-        matches = self.conn.execute(sql, {"q": q_vec.astype(np.float32), "k": k}).fetchall()
+        matches = self.conn.execute(self._sql_similar_reports, {"q": q_vec, "k": k}).fetchall()
         results = []
         for m in matches:
             d = float(m["distance"]) if m["distance"] is not None else 2.0
@@ -1095,8 +1685,67 @@ class AgentVectorDB:
             })
         return {"ok": True, "results": results}
 
+    def _embed_docs(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed several documents, batching the uncached ones into model calls.
+
+        Vectors come from :attr:`_embedding_cache` when the same text was
+        embedded recently; the rest are embedded in calls of at most
+        ``search.embed_batch_size`` texts and cached, which bounds the memory
+        of a single call. The returned arrays are read-only.
+        """
+
+        out: list[np.ndarray | None] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+        for i, text in enumerate(texts):
+            cached = self._embedding_cache.get(text)
+            if cached is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                out[i] = cached
+        pending = list(missing.items())
+        for start in range(0, len(pending), self._embed_batch_size):
+            batch = pending[start : start + self._embed_batch_size]
+            # embed() may return a generator; stack it into one matrix so the
+            # index conversion runs as a single vectorised pass over the batch
+            vectors = self.embedder.embed([self._prefix + text for text, _ in batch])
+            matrix = self._to_index_vector(np.stack(list(vectors)))
+            for (text, positions), index_vec in zip(batch, matrix):
+                self._embedding_cache.put(text, index_vec)
+                for i in positions:
+                    out[i] = index_vec
+        return out  # type: ignore[return-value]
+
     def _embed_doc(self, text: str) -> np.ndarray:
-        # embed() yields a generator of vectors; take the first and return float32 ndarray
-        vec_iter = self.embedder.embed([self._prefix + text])
-        vec = next(iter(vec_iter))
-        return np.asarray(vec, dtype=np.float32)
+        return self._embed_docs([text])[0]
+
+    def _to_index_vector(self, vec: T.Any) -> np.ndarray:
+        """Convert an embedding into the element type of the vector tables.
+
+        Vectors are scaled to unit length for both storage types, so stored
+        blobs are directly comparable by dot product and cosine distances
+        do not depend on the model's output scale. For ``int8`` storage each
+        vector is then scaled so its largest component is ``±127``. Cosine
+        distance ignores that per-vector scale, so no scale is stored, and
+        using the full integer range keeps rounding error low even for
+        high-dimensional embeddings whose unit-vector components are small.
+        ``vec`` may also be a 2-D batch, in which case every row is converted.
+        """
+
+        arr = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(arr, axis=-1, keepdims=True)
+        arr = np.divide(arr, norm, out=np.zeros_like(arr), where=norm > 0)
+        if self._vec_type != "int8":
+            return arr
+        peak = np.abs(arr).max(axis=-1, keepdims=True)
+        arr = np.divide(arr * 127.0, peak, out=np.zeros_like(arr), where=peak > 0)
+        return np.clip(np.rint(arr), -127, 127).astype(np.int8)
+
+    def _vec_table_sql(self, name: str) -> str:
+        column_type = "INT8" if self._vec_type == "int8" else "FLOAT"
+        return f"""
+            CREATE VIRTUAL TABLE {name} USING vec0(
+              file_id INTEGER PRIMARY KEY,
+              embedding {column_type}[{self._dim}] distance_metric=cosine,
+              +path_rel TEXT
+            );
+            """
@@ -0,0 +1,42 @@
+"""Process-wide :class:`AgentVectorDB` instances shared between agents."""
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+from agent_utils import agent_vector_db
+from agent_utils.paths import ROOT_CONFIG_STR
+
+
+@lru_cache(maxsize=4)
+def _db_for(config_path: str) -> agent_vector_db.AgentVectorDB:
+    return agent_vector_db.AgentVectorDB(config_path=config_path)
+
+
+def get_db(config_path: str = ROOT_CONFIG_STR) -> agent_vector_db.AgentVectorDB:
+    """Return the shared database for ``config_path``, creating it on first use.
+
+    The decider and planner tools run in the same process. Sharing one
+    instance per configuration file means one SQLite connection and one
+    loaded embedding model between them. Paths are normalised so relative
+    and absolute spellings of the same file share an instance.
+
+    Parameters
+    ----------
+    config_path:
+        Path to the JSON configuration file. Defaults to the repository's
+        ``organizer.config.json``.
+
+    Returns
+    -------
+    AgentVectorDB
+        The cached database instance.
+    """
+
+    return _db_for(os.path.abspath(config_path))
+
+
+def clear_db_cache() -> None:
+    """Forget all shared instances so the next :func:`get_db` call reconnects."""
+
+    _db_for.cache_clear()
@@ -1,21 +1,67 @@
 """Utilities for displaying folder trees."""
 from __future__ import annotations
 
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
+import diskcache
 
-def target_folder_tree(path: str) -> Dict[str, Any]:
+TREE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "organizer_tree_cache")
+# Only the root's mtime is part of the key, so changes deeper in the tree are
+# picked up once the entry expires.
+TREE_CACHE_TTL_SECONDS = 30
+
+# Directory listings are I/O bound, so more threads than cores help on
+# high-latency mounts; the cap avoids flooding network filesystems.
+TREE_WALK_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Recently rendered trees kept in this process in front of the disk cache,
+# mapping cache keys to ``(expires_at, result)``.
+TREE_MEMORY_CACHE_SIZE = 32
+
+_cache: Optional[diskcache.Cache] = None
+_memory_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _tree_cache() -> diskcache.Cache:
+    """Return the on-disk cache shared by every process rendering trees."""
+
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        _cache = diskcache.Cache(TREE_CACHE_DIR)
+    return _cache
+
+
+def target_folder_tree(path: str, use_cache: bool = True) -> Dict[str, Any]:
     """Return a folder tree for ``path`` with a heading.
 
-    The function attempts to traverse ``path`` recursively while collecting any
-    errors encountered along the way.  All discovered entries are returned even
-    if some directories cannot be read.
+    The function lists ``path`` with :func:`os.scandir`, one directory per
+    worker thread, while collecting any errors encountered along the way. All
+    discovered entries are returned even if some directories or entries cannot
+    be read.
+
+    Successful renders of directories are stored gzip-compressed in a
+    :mod:`diskcache` keyed by the directory and its modification time, so the
+    CLI, the web app and every agent reuse one walk for
+    :data:`TREE_CACHE_TTL_SECONDS`. The last :data:`TREE_MEMORY_CACHE_SIZE`
+    renders are also kept in memory, so repeated calls from one planning loop
+    skip the disk cache as well.
 
     Parameters
     ----------
     path:
         Path for which a folder tree should be created.
+    use_cache:
+        Whether to consult and populate the shared tree cache.
 
     Returns
     -------
@@ -34,37 +80,132 @@ def target_folder_tree(path: str) -> Dict[str, Any]:
         errors.append(f"Path does not exist: {p}")
         return {"tree": "\n".join(lines), "errors": errors}
 
-    def walk(current: Path, prefix: str = "") -> None:
-        try:
-            entries = sorted(
-                current.iterdir(),
-                key=lambda e: (not e.is_dir(), e.name.lower()),
-            )
-        except Exception as exc:  # pragma: no cover - rare OS errors
-            errors.append(f"{current}: {exc}")
-            return
-
-        count = len(entries)
-        for idx, entry in enumerate(entries):
-            connector = "└── " if idx == count - 1 else "├── "
+    if not p.is_dir():
+        lines.append(p.name)
+        return {"tree": "\n".join(lines)}
+
+    key = (os.path.abspath(p), p.stat().st_mtime_ns)
+    if use_cache:
+        cached = _memory_get(key)
+        if cached is not None:
+            return cached
+        cached = _tree_cache().get(key)
+        if cached is not None:
+            result = json.loads(gzip.decompress(cached))
+            _memory_put(key, result)
+            return dict(result)
+
+    _render_tree(_list_children(str(p), errors), str(p), lines)
+    result: Dict[str, Any] = {"tree": "\n".join(lines)}
+    if errors:
+        result["errors"] = errors
+    elif use_cache:
+        payload = gzip.compress(json.dumps(result).encode("utf-8"))
+        _tree_cache().set(key, payload, expire=TREE_CACHE_TTL_SECONDS)
+        _memory_put(key, result)
+    return result
+
+
+def _memory_get(key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+    with _memory_lock:
+        entry = _memory_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del _memory_cache[key]
+            return None
+        _memory_cache.move_to_end(key)
+        return dict(result)
+
+
+def _memory_put(key: Tuple[str, int], result: Dict[str, Any]) -> None:
+    with _memory_lock:
+        _memory_cache[key] = (time.monotonic() + TREE_CACHE_TTL_SECONDS, dict(result))
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > TREE_MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _scan_dir(root: str) -> Tuple[List[Tuple[str, bool]], List[str], List[str]]:
+    """List ``root`` as sorted ``(name, is_dir)`` entries plus subdirectories to walk.
+
+    Type checks use the :class:`os.DirEntry` cache, so most entries cost no
+    extra ``stat`` call. Entries whose type cannot be read are left out and
+    reported in the third item of the result.
+    """
+
+    dirs: List[str] = []
+    files: List[str] = []
+    descend: List[str] = []
+    errors: List[str] = []
+    with os.scandir(root) as it:
+        for entry in it:
             try:
                 is_dir = entry.is_dir()
-            except Exception as exc:  # pragma: no cover - rare OS errors
-                errors.append(f"{entry}: {exc}")
+            except OSError as exc:
+                errors.append(f"{entry.path}: {exc}")
                 continue
             if is_dir:
-                lines.append(f"{prefix}{connector}{entry.name}/")
-                extension = "    " if idx == count - 1 else "│   "
-                walk(entry, prefix + extension)
+                dirs.append(entry.name)
+                if not entry.is_symlink():
+                    descend.append(entry.path)
             else:
-                lines.append(f"{prefix}{connector}{entry.name}")
+                files.append(entry.name)
+    dirs.sort(key=str.lower)
+    files.sort(key=str.lower)
+    entries = [(name, True) for name in dirs] + [(name, False) for name in files]
+    return entries, descend, errors
 
-    if p.is_dir():
-        walk(p)
-    else:
-        lines.append(p.name)
 
-    result: Dict[str, Any] = {"tree": "\n".join(lines)}
-    if errors:
-        result["errors"] = errors
-    return result
+def _list_children(top: str, errors: List[str]) -> Dict[str, List[Tuple[str, bool]]]:
+    """Map every directory below ``top`` to its sorted ``(name, is_dir)`` entries.
+
+    Directories are listed before files and both are ordered
+    case-insensitively. Symbolic links to directories are listed but not
+    descended into. Each directory is listed by a pool of
+    :data:`TREE_WALK_WORKERS` threads as soon as its parent has been read.
+    """
+
+    children: Dict[str, List[Tuple[str, bool]]] = {}
+    with ThreadPoolExecutor(
+        max_workers=TREE_WALK_WORKERS, thread_name_prefix="tree-walk"
+    ) as pool:
+        pending: Dict[Future, str] = {pool.submit(_scan_dir, top): top}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                root = pending.pop(future)
+                try:
+                    entries, descend, entry_errors = future.result()
+                except OSError as exc:
+                    errors.append(f"{exc.filename}: {exc}")
+                    continue
+                errors.extend(entry_errors)
+                children[root] = entries
+                for sub in descend:
+                    pending[pool.submit(_scan_dir, sub)] = sub
+    return children
+
+
+def _render_tree(
+    children: Dict[str, List[Tuple[str, bool]]], top: str, lines: List[str]
+) -> None:
+    """Append the tree lines for ``top`` to ``lines`` using an explicit stack."""
+
+    stack: List[Tuple[str, str, int]] = [(top, "", 0)]
+    while stack:
+        root, prefix, idx = stack.pop()
+        entries = children.get(root, [])
+        if idx >= len(entries):
+            continue
+        stack.append((root, prefix, idx + 1))
+        name, is_dir = entries[idx]
+        is_last = idx == len(entries) - 1
+        connector = "└── " if is_last else "├── "
+        if is_dir:
+            lines.append(f"{prefix}{connector}{name}/")
+            extension = "    " if is_last else "│   "
+            stack.append((os.path.join(root, name), prefix + extension, 0))
+        else:
+            lines.append(f"{prefix}{connector}{name}")
@@ -0,0 +1,11 @@
+"""Repository-relative paths resolved once at import time."""
+from __future__ import annotations
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ROOT_CONFIG = REPO_ROOT / "organizer.config.json"
+# String form for ``open()`` and environment defaults, avoiding ``__fspath__``.
+ROOT_CONFIG_STR = str(ROOT_CONFIG)
+
+__all__ = ["REPO_ROOT", "ROOT_CONFIG", "ROOT_CONFIG_STR"]
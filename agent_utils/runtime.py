@@ -0,0 +1,55 @@
+"""Event loop configuration shared by the organizer agents."""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+def _loop_module_name() -> str:
+    """Return the name of the accelerated event loop package for this platform."""
+
+    return "winloop" if sys.platform == "win32" else "uvloop"
+
+
+def configure_event_loop(config_path: Union[str, Path]) -> bool:
+    """Install ``uvloop`` (or ``winloop`` on Windows) when enabled in the config.
+
+    The accelerated loop is only installed when ``use_uvloop`` is ``true`` in
+    the organizer configuration. Missing packages are tolerated so the agents
+    keep working on the stock :mod:`asyncio` loop.
+
+    Parameters
+    ----------
+    config_path:
+        Path to the JSON configuration file.
+
+    Returns
+    -------
+    bool
+        ``True`` if an accelerated event loop policy was installed.
+    """
+
+    try:
+        with open(config_path, "r", encoding="utf-8") as fh:
+            cfg = json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cfg = {}
+    if not cfg.get("use_uvloop", False):
+        return False
+
+    module_name = _loop_module_name()
+    try:
+        loop_module = importlib.import_module(module_name)
+    except ImportError:
+        logger.info("%s not installed; using the default asyncio event loop", module_name)
+        return False
+    asyncio.set_event_loop_policy(loop_module.EventLoopPolicy())
+    logger.info("Installed %s event loop policy", module_name)
+    return True
@@ -15,17 +15,19 @@ from pydantic_ai.tools import RunContext
 
 from file_analysis_agent.agent_tools import tools
 from agent_utils import setup_logging
+from agent_utils.paths import ROOT_CONFIG_STR
+from agent_utils.runtime import configure_event_loop
 
 PROMPT_PATH = Path(__file__).with_name("prompt.md")
-ROOT_CONFIG = Path(__file__).resolve().parents[1] / "organizer.config.json"
 
-setup_logging(str(ROOT_CONFIG))
+setup_logging(ROOT_CONFIG_STR)
+configure_event_loop(ROOT_CONFIG_STR)
 logger = logging.getLogger(__name__)
 
 
 def load_config() -> Dict[str, Any]:
     """Load configuration for the agent from the main config file."""
-    with ROOT_CONFIG.open(encoding="utf-8") as config_file:
+    with open(ROOT_CONFIG_STR, encoding="utf-8") as config_file:
         cfg = json.load(config_file)
     agent_cfg = cfg.get("file_analysis_agent", {})
     agent_cfg.setdefault("api_key", cfg.get("api_key", ""))
@@ -11,6 +11,7 @@ from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from pathlib import Path
 from typing import List, Optional
 
+import numpy as np
 import tiktoken
 from pydantic import BaseModel
 
@@ -20,6 +21,9 @@ from .converter import convert_to_markdown
 
 logger = logging.getLogger(__name__)
 
+# Constructs whose result can depend on text outside the current line.
+_WHOLE_TEXT_TOKENS = ("\\A", "\\Z", "(?=", "(?!", "(?<=", "(?<!")
+
 
 class SliceOutput(BaseModel):
     start_line: int
@@ -48,13 +52,31 @@ class MetadataOutput(BaseModel):
     cache: Optional[dict] = None
 
 
+def _line_starts(text: str, num_lines: int) -> np.ndarray:
+    """Return the offset of each line start in ``text`` plus an end sentinel.
+
+    ``text`` holds ``num_lines`` lines joined by ``"\n"``; the sentinel sits
+    one past the end so line ``i`` (0-based) is
+    ``text[starts[i] : starts[i + 1] - 1]``.
+    """
+    if not num_lines:
+        return np.zeros(1, dtype=np.int64)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    breaks = np.flatnonzero(codes == ord("\n")) + 1
+    return np.concatenate(([0], breaks, [len(text) + 1])).astype(np.int64)
+
+
 class FileAnalyzer:
     """Stateful analyzer used by tools."""
 
     def __init__(self) -> None:
         self.cache = CacheManager()
         self.current_file: Optional[Path] = None
-        self.current_lines: List[str] = []
+        # The loaded markdown with lines joined by "\n", the offset of each
+        # line start plus a sentinel one past the end, and its token count.
+        self.current_text: str = ""
+        self.line_starts: np.ndarray = np.zeros(1, dtype=np.int64)
+        self._token_count: Optional[int] = None
         self.cache_entry: Optional[CacheEntry] = None
         self.last_error: Optional[str] = None
 
@@ -83,7 +105,10 @@ class FileAnalyzer:
                 entry = self.cache.save(file_path, markdown)
                 self.cache_entry = entry
             self.current_file = file_path
-            self.current_lines = markdown.splitlines()
+            lines = markdown.splitlines()
+            self.current_text = "\n".join(lines)
+            self.line_starts = _line_starts(self.current_text, len(lines))
+            self._token_count = None
             self.last_error = None
             return {"status": "ok", "message": "file successfully loaded for analysis"}
 
@@ -103,8 +128,16 @@ class FileAnalyzer:
                 logger.exception("Conversion failed")
                 return {"status": "error", "message": msg}
 
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) - 1
+
+    def _lines(self, first: int, last: int) -> str:
+        """Return lines ``first`` to ``last`` (1-based, inclusive) as one string."""
+        return self.current_text[self.line_starts[first - 1] : self.line_starts[last] - 1]
+
     def _ensure_loaded(self) -> Optional[dict]:
-        if not self.current_lines:
+        if not self.line_count:
             return {"status": "error", "message": self.last_error or "no file loaded"}
         return None
 
@@ -113,37 +146,32 @@ class FileAnalyzer:
         if err:
             return err
         start = max(start_line, 1)
-        end = min(start + num_lines - 1, len(self.current_lines))
-        text = "\n".join(self.current_lines[start - 1 : end])
+        end = min(start + num_lines - 1, self.line_count)
+        text = self._lines(start, end) if start <= end else ""
         return SliceOutput(start_line=start, end_line=end, text=self._truncate(text)).model_dump()
 
     def text_content_length(self) -> int:
         err = self._ensure_loaded()
         if err:
             return err
-        return len(self.current_lines)
+        return self.line_count
 
     def tail(self, num_lines: int = 50) -> dict:
         err = self._ensure_loaded()
         if err:
             return err
-        end = len(self.current_lines)
+        end = self.line_count
         start = max(end - num_lines + 1, 1)
-        text = "\n".join(self.current_lines[start - 1 : end])
+        text = self._lines(start, end) if start <= end else ""
         return SliceOutput(start_line=start, end_line=end, text=self._truncate(text)).model_dump()
 
     def read_full_file(self) -> dict:
         err = self._ensure_loaded()
         if err:
             return err
-        text = "\n".join(self.current_lines)
-        try:
-            enc = tiktoken.get_encoding(CONFIG.encoding_name)
-            tokens = enc.encode(text)
-        except Exception:
-            # Fallback if tiktoken data is unavailable
-            tokens = text.split()
-        if len(tokens) > CONFIG.token_limit:
+        text = self.current_text
+        token_count = self._count_tokens()
+        if token_count > CONFIG.token_limit:
             msg = (
                 "unable to return full file as it exceeds token limit"
             )
@@ -152,7 +180,18 @@ class FileAnalyzer:
                 "message": msg,
                 "text": self._truncate(text),
             }
-        return {"text": self._truncate(text), "token_count": len(tokens)}
+        return {"text": self._truncate(text), "token_count": token_count}
+
+    def _count_tokens(self) -> int:
+        """Return the token count of the loaded file, counting it on first use."""
+        if self._token_count is None:
+            try:
+                enc = tiktoken.get_encoding(CONFIG.encoding_name)
+                self._token_count = len(enc.encode(self.current_text))
+            except Exception:
+                # Fallback if tiktoken data is unavailable
+                self._token_count = len(self.current_text.split())
+        return self._token_count
 
     def find_within_doc(self, regex_string: str, flags: Optional[str] = None, max_hits: int = 50) -> dict:
         err = self._ensure_loaded()
@@ -167,8 +206,52 @@ class FileAnalyzer:
         except re.error as exc:
             return {"status": "error", "message": f"regex compilation error: {exc}"}
 
+        hits = self._find_in_text(pattern, regex_string, max_hits)
+        if hits is None:
+            hits = self._find_per_line(pattern, max_hits)
+        return {"hits": [h.model_dump() for h in hits]}
+
+    def _find_in_text(
+        self, pattern: re.Pattern, regex_string: str, max_hits: int
+    ) -> Optional[List[FindHit]]:
+        """Match ``pattern`` over the whole document in one ``finditer`` pass.
+
+        Match positions are mapped to lines through :attr:`line_starts`.
+        Returns ``None`` when the result could differ from matching each line
+        on its own: a match spans a line break, or the pattern uses the
+        string anchors ``\\A``/``\\Z`` or a lookaround, which could peek
+        past the end of the line without consuming it.
+        """
+        if any(token in regex_string for token in _WHOLE_TEXT_TOKENS):
+            return None
+        multiline = re.compile(pattern.pattern, pattern.flags | re.MULTILINE)
+        matches: List[re.Match] = []
+        for match in multiline.finditer(self.current_text):
+            if "\n" in match.group():
+                return None
+            matches.append(match)
+            if len(matches) >= max_hits:
+                break
+        positions = np.fromiter((m.start() for m in matches), dtype=np.int64, count=len(matches))
+        line_idx = np.searchsorted(self.line_starts, positions, side="right")
         hits: List[FindHit] = []
-        for idx, line in enumerate(self.current_lines, start=1):
+        for match, idx in zip(matches, line_idx.tolist()):
+            offset = int(self.line_starts[idx - 1])
+            hits.append(
+                FindHit(
+                    line=idx,
+                    match=match.group(),
+                    start=match.start() - offset + 1,
+                    end=match.end() - offset + 1,
+                    context=self._lines(idx, idx),
+                )
+            )
+        return hits
+
+    def _find_per_line(self, pattern: re.Pattern, max_hits: int) -> List[FindHit]:
+        hits: List[FindHit] = []
+        for idx in range(1, self.line_count + 1):
+            line = self._lines(idx, idx)
             for match in pattern.finditer(line):
                 hits.append(
                     FindHit(
@@ -180,17 +263,15 @@ class FileAnalyzer:
                     )
                 )
                 if len(hits) >= max_hits:
-                    break
-            if len(hits) >= max_hits:
-                break
-        return {"hits": [h.model_dump() for h in hits]}
+                    return hits
+        return hits
 
     def get_random_lines(self, start: int = 1, num_lines: int = 20, seed: Optional[int] = None) -> dict:
         err = self._ensure_loaded()
         if err:
             return err
         rng = random.Random(seed)
-        total_lines = len(self.current_lines)
+        total_lines = self.line_count
         if total_lines <= num_lines:
             start_line = 1
             end_line = total_lines
@@ -199,7 +280,7 @@ class FileAnalyzer:
             max_start = max(total_lines - num_lines + 1, min_start)
             start_line = rng.randint(min_start, max_start)
             end_line = min(start_line + num_lines - 1, total_lines)
-        text = "\n".join(self.current_lines[start_line - 1 : end_line])
+        text = self._lines(start_line, end_line) if start_line <= end_line else ""
         return SliceOutput(start_line=start_line, end_line=end_line, text=self._truncate(text)).model_dump()
 
     def get_file_metadata(self) -> dict:
@@ -6,6 +6,8 @@ from pathlib import Path
 
 from pydantic import BaseModel, Field
 
+from agent_utils.paths import ROOT_CONFIG
+
 
 class AgentConfig(BaseModel):
     """Runtime configuration for the file analysis agent."""
@@ -31,9 +33,6 @@ class AgentConfig(BaseModel):
     )
 
 
-ROOT_CONFIG = Path(__file__).resolve().parents[2] / "organizer.config.json"
-
-
 def _load_config_from_file() -> AgentConfig:
     """Load configuration from the main config file if present."""
     if ROOT_CONFIG.exists():
@@ -2,37 +2,36 @@
 from __future__ import annotations
 
 import os
-from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
 
 from agent_utils.agent_vector_db import AgentVectorDB
+from agent_utils.db_singleton import get_db as _shared_db
 from agent_utils.folder_tree import target_folder_tree as _target_folder_tree
+from agent_utils.paths import ROOT_CONFIG_STR
 
-_DEFAULT_CONFIG = Path(__file__).resolve().parents[2] / "organizer.config.json"
-_CONFIG_PATH = os.environ.get("FILE_ORGANIZER_CONFIG", str(_DEFAULT_CONFIG))
 
-# Global database instance used by the tools
-_db = AgentVectorDB(config_path=_CONFIG_PATH)
+# Database override installed via set_db; the shared instance is used otherwise
+_db: Optional[AgentVectorDB] = None
 
 
 def append_organization_cluser_notes(ids: Iterable[int], notes: str) -> dict:
     """Append organization notes for the given file ``ids``."""
-    return _db.append_organization_cluser_notes(ids, notes)
+    return get_db().append_organization_cluser_notes(ids, notes)
 
 
 def get_file_report(path: str) -> dict:
     """Retrieve the stored file report for ``path``."""
-    return _db.get_file_report(path)
+    return get_db().get_file_report(path)
 
 
 def set_planned_destination(path: str, planned_dest: str) -> dict:
     """Set the planned destination for ``path``."""
-    return _db.set_planned_destination(path, planned_dest)
+    return get_db().set_planned_destination(path, planned_dest)
 
 
 def get_organization_notes(path: str) -> dict:
     """Retrieve the organization notes for ``path``."""
-    return _db.get_organization_notes(path)
+    return get_db().get_organization_notes(path)
 
 
 def get_planned_destination_folders(proposed_folder_path: str) -> str:
@@ -50,7 +49,7 @@ def get_planned_destination_folders(proposed_folder_path: str) -> str:
         ``proposed_folder_path``.
     """
 
-    res = _db.planned_destination_folders_for_proposed(proposed_folder_path)
+    res = get_db().planned_destination_folders_for_proposed(proposed_folder_path)
     if not res.get("ok"):
         return str(res)
     folders: list[str] = res.get("folders", [])
@@ -68,7 +67,7 @@ def get_planned_destination_folders(proposed_folder_path: str) -> str:
 
 def get_folder_instructions() -> dict:
     """Retrieve user folder organization instructions."""
-    return _db.get_instructions()
+    return get_db().get_instructions()
 
 
 def target_folder_tree() -> dict:
@@ -83,15 +82,33 @@ def target_folder_tree() -> dict:
         If the ``target_dir`` configuration option has not been set.
     """
 
-    target_dir = _db.config.get("target_dir")
+    target_dir = get_db().config.get("target_dir")
     if not target_dir:
         raise ValueError("target_dir is not configured")
     return _target_folder_tree(target_dir)
 
 
 def get_db() -> AgentVectorDB:
-    """Return the global database instance (primarily for tests)."""
-    return _db
+    """Return the database used by the tools.
+
+    Unless replaced via :func:`set_db`, this is the process-wide instance
+    from :func:`agent_utils.db_singleton.get_db`, shared with the other
+    agent packages and created on first use.
+    """
+
+    if _db is not None:
+        return _db
+    return _shared_db(_config_path())
+
+
+def _config_path() -> str:
+    """Return the configuration file named by ``FILE_ORGANIZER_CONFIG``.
+
+    The variable is read on every call so a changed value takes effect without
+    re-importing this module.
+    """
+
+    return os.environ.get("FILE_ORGANIZER_CONFIG", ROOT_CONFIG_STR)
 
 
 def set_db(db: AgentVectorDB) -> None:
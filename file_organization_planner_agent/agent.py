@@ -1,10 +1,12 @@
 """PydanticAI agent exposing file organization planner tools."""
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
 from pathlib import Path
 import json
 import logging
-from typing import Any, AsyncIterable, Dict
+from typing import Any, AsyncIterable, Dict, Optional
 
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIModel
@@ -15,18 +17,27 @@ from pydantic_ai.tools import RunContext
 
 from .agent_tools import tools
 from agent_utils import setup_logging
+from agent_utils.paths import ROOT_CONFIG_STR
+from agent_utils.runtime import configure_event_loop
 
 
 PROMPT_PATH = Path(__file__).with_name("prompt.md")
-ROOT_CONFIG = Path(__file__).resolve().parents[1] / "organizer.config.json"
 
-setup_logging(str(ROOT_CONFIG))
+setup_logging(ROOT_CONFIG_STR)
+configure_event_loop(ROOT_CONFIG_STR)
 logger = logging.getLogger(__name__)
 
+SIMILAR_TOP_K = 10
+
+# Lookups started speculatively for the file being planned, keyed by path and
+# tool name. Tool wrappers consume them once, then fall back to direct calls.
+_prefetched: ContextVar[Dict[str, Dict[str, Future]]] = ContextVar("planner_prefetched")
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="planner-prefetch")
+
 
 def load_config() -> Dict[str, Any]:
     """Load configuration for the planner agent from the main config file."""
-    with ROOT_CONFIG.open(encoding="utf-8") as config_file:
+    with open(ROOT_CONFIG_STR, encoding="utf-8") as config_file:
         cfg = json.load(config_file)
     agent_cfg = cfg.get("file_organization_planner_agent", {})
     agent_cfg.setdefault("api_key", cfg.get("api_key", ""))
@@ -54,10 +65,33 @@ async def _log_event_stream(
         logger.info("planner agent event: %s", event)
 
 
+def _prefetch_tool_results(path: str) -> Dict[str, Future]:
+    """Start the lookups the planner almost always performs first for ``path``."""
+
+    return {
+        "get_file_report": _prefetch_pool.submit(tools.get_file_report, path),
+        "find_similar_file_reports": _prefetch_pool.submit(
+            tools.find_similar_file_reports, path, top_k=SIMILAR_TOP_K
+        ),
+    }
+
+
+def _take_prefetched(tool_name: str, path: str) -> Optional[Future]:
+    """Return and consume the pending ``tool_name`` lookup for ``path``."""
+
+    pending = _prefetched.get({}).get(path)
+    if not pending:
+        return None
+    return pending.pop(tool_name, None)
+
+
 @agent.tool_plain
 def find_similar_file_reports(path: str) -> dict:
     """Find semantically similar file reports for ``path``."""
-    return tools.find_similar_file_reports(path, top_k=10)
+    future = _take_prefetched("find_similar_file_reports", path)
+    if future is not None:
+        return future.result()
+    return tools.find_similar_file_reports(path, top_k=SIMILAR_TOP_K)
 
 
 @agent.tool_plain
@@ -75,6 +109,9 @@ def append_organization_anchor_notes(path: str, notes: str) -> dict:
 @agent.tool_plain
 def get_file_report(path: str) -> dict:
     """Retrieve the stored file report for ``path``."""
+    future = _take_prefetched("get_file_report", path)
+    if future is not None:
+        return future.result()
     return tools.get_file_report(path)
 
 
@@ -107,15 +144,28 @@ def ask_file_organization_planner_agent(
     -------
     str
         The agent's textual response.
+
+    Notes
+    -----
+    The file report and similar-report lookups for ``path`` are started in
+    the background before the model is queried, so the first tool calls for
+    them return without waiting on the database.
     """
 
     agent_query = f"{query} {path}"
     logger.info("file_organization_planner_agent query: %s", agent_query)
-    response = agent.run_sync(
-        agent_query,
-        usage_limits=UsageLimits(request_limit=20),
-        event_stream_handler=_log_event_stream,
-    )
+    pending = _prefetch_tool_results(path)
+    token = _prefetched.set({path: pending})
+    try:
+        response = agent.run_sync(
+            agent_query,
+            usage_limits=UsageLimits(request_limit=20),
+            event_stream_handler=_log_event_stream,
+        )
+    finally:
+        _prefetched.reset(token)
+        for future in pending.values():
+            future.cancel()
     logger.info(
         "file_organization_planner_agent response: %s", response.output
     )
@@ -3,8 +3,15 @@
 # pylint: disable=missing-function-docstring
 
 from __future__ import annotations
-from typing import Any, Dict, List, Literal, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Literal, Optional
+from dataclasses import dataclass, replace
 from datetime import datetime
+from itertools import islice
+import asyncio
+import base64
+import json
 import logging
 import os
 import re
@@ -12,13 +19,28 @@ import shutil
 import threading
 import time
 
-from fastapi import FastAPI, HTTPException  # pylint: disable=import-error
+from fastapi import BackgroundTasks, FastAPI, HTTPException  # pylint: disable=import-error
 from fastapi.middleware.cors import CORSMiddleware  # pylint: disable=import-error
-from fastapi.responses import FileResponse  # pylint: disable=import-error
+from fastapi.middleware.gzip import GZipMiddleware  # pylint: disable=import-error
+from fastapi.responses import (  # pylint: disable=import-error
+    FileResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles  # pylint: disable=import-error
 from pydantic import BaseModel
 
-from agent_utils.agent_vector_db import AgentVectorDB, PROCESSING_SENTINELS
+try:  # optional faster JSON encoder for large listings
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None  # type: ignore[assignment]
+
+from agent_utils.agent_vector_db import (
+    FTS_MIN_QUERY_LENGTH,
+    PROCESSING_SENTINELS,
+    AgentVectorDB,
+    UnknownFileError,
+)
 
 # ---------- App + CORS ----------
 BASE_DIR = os.path.dirname(__file__)
@@ -32,6 +54,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Listings with long previews compress well; skip small JSON bodies.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
 
 # Serve static UI
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -46,42 +70,181 @@ db.clear_processing_file_reports()
 
 logger = logging.getLogger(__name__)
 
+# Paths inserted per transaction while scanning.
+SCAN_BATCH_SIZE = 1000
+
 # ---------- Single-action state ----------
+ACTION_STATUS_TEXT = {
+    "scan": "Scanning source files…",
+    "analyze": "File analysis in progress…",
+    "plan": "Planning…",
+    "decide": "Final decisions…",
+    "move": "Moving files…",
+}
+
+
+@dataclass(frozen=True)
+class RunSnapshot:
+    """Immutable view of the current action state."""
+
+    current_action: Optional[str] = None  # "scan" | "analyze" | ...
+    started_at: Optional[float] = None
+    status_text: str = "Idle"
+
+
 class RunState:
-    """Track the state of a long-running action."""
+    """Track the state of a long-running action.
+
+    The state lives in a single :class:`RunSnapshot` that is swapped as a
+    whole, so readers get a consistent view without taking the lock. The lock
+    only serialises writers.
+    """
 
     def __init__(self):
         self._lock = threading.Lock()
-        self.current_action: Optional[str] = None  # "scan" | "analyze" | ...
-        self.started_at: Optional[float] = None
-        self.status_text: str = "Idle"
+        self._ref = RunSnapshot()
         self.cancel_event = threading.Event()
 
-    def start(self, action: str):
+    def snapshot(self) -> RunSnapshot:
+        return self._ref
+
+    @property
+    def current_action(self) -> Optional[str]:
+        return self._ref.current_action
+
+    @property
+    def started_at(self) -> Optional[float]:
+        return self._ref.started_at
+
+    @property
+    def status_text(self) -> str:
+        return self._ref.status_text
+
+    @status_text.setter
+    def status_text(self, value: str) -> None:
+        with self._lock:
+            self._ref = replace(self._ref, status_text=value)
+
+    def start(self, action: str) -> threading.Event:
+        """Start ``action`` and return the cancel event of its run.
+
+        Restarting the running action cancels the previous run, which keeps
+        its own event, so that event can never be handed to the new run.
+        """
+        fresh = RunSnapshot(action, time.time(), ACTION_STATUS_TEXT.get(action, "Working…"))
         with self._lock:
-            if self.current_action and self.current_action != action:
-                raise RuntimeError(f"Another action '{self.current_action}' is running.")
-            if not self.current_action:
-                self.current_action = action
-                self.started_at = time.time()
-                self.status_text = {
-                    "scan": "Scanning source files…",
-                    "analyze": "File analysis in progress…",
-                    "plan": "Planning…",
-                    "decide": "Final decisions…",
-                    "move": "Moving files…",
-                }.get(action, "Working…")
-                self.cancel_event.clear()
+            current = self._ref.current_action
+            if current and current != action:
+                raise RuntimeError(f"Another action '{current}' is running.")
+            if current:
+                self.cancel_event.set()
+            self._ref = fresh
+            # A fresh event per run: workers of a cancelled run keep seeing
+            # their own event set after a new run has started.
+            self.cancel_event = threading.Event()
+            return self.cancel_event
 
     def stop(self):
         with self._lock:
             self.cancel_event.set()
-            self.current_action = None
-            self.started_at = None
-            self.status_text = "Stopped"
+            self._ref = RunSnapshot(status_text="Stopped")
+
+    def finish(self, cancel_event: threading.Event, status_text: str = "Idle") -> bool:
+        """Stop the run owning ``cancel_event`` and leave ``status_text`` behind.
+
+        Does nothing when another run has started since, so a late-finishing
+        worker cannot reset the state of the run that replaced it.
+
+        Returns
+        -------
+        bool
+            Whether the state still belonged to the run and was reset.
+        """
+        with self._lock:
+            cancel_event.set()
+            if self.cancel_event is not cancel_event:
+                return False
+            self._ref = RunSnapshot(status_text=status_text)
+            return True
 
 runstate = RunState()
 
+# ---------- Response caching ----------
+class ResponseCache:
+    """LRU cache of endpoint payloads tagged with the data version they show.
+
+    Entries are only returned for the exact version they were built from, so
+    any committed write, from this process or another, makes them
+    unreachable. ``ttl_seconds`` additionally bounds how long an entry may
+    live.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 2.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, tuple[Any, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, version: Any) -> Any:
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_version, stored_at, payload = entry
+            if stored_version != version or time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: Any, version: Any, payload: Any) -> None:
+        with self._lock:
+            self._entries[key] = (version, time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_response_cache = ResponseCache()
+_status_cache: Optional[tuple[RunSnapshot, Dict[str, Any]]] = None
+
+
+def _data_version() -> Optional[tuple[int, int, int]]:
+    """Return a token that changes whenever the database is written.
+
+    The token combines the served ``db`` with :meth:`AgentVectorDB.data_version`,
+    which covers writes through ``db`` itself and commits from any other
+    connection, such as the agents' shared database instance. ``None`` is
+    returned while ``db`` is mid-write, to bypass caching; the check never
+    waits for the write, so async endpoints may call it on the event loop.
+    """
+
+    token = db.data_version()
+    if token is None:
+        return None
+    return (id(db), *token)
+
+
+def set_db(new_db: AgentVectorDB) -> None:
+    """Serve requests from ``new_db`` and drop responses cached for the old one.
+
+    Parameters
+    ----------
+    new_db:
+        Database the endpoints should use from now on.
+    """
+
+    global db, _status_cache  # pylint: disable=global-statement
+    db = new_db
+    _status_cache = None
+    _response_cache.clear()
+
 # ---------- Schemas ----------
 class ConfigOut(BaseModel):
     """Configuration response."""
@@ -142,13 +305,18 @@ class FileRowFull(BaseModel):
     updated_at: str
 
 class FilesListOut(BaseModel):
-    """Paginated list of files."""
+    """Paginated list of files.
+
+    ``next_cursor`` is set when a further page may exist; pass it back as
+    ``cursor`` to continue from the last row without an ``OFFSET`` scan.
+    """
 
     ok: bool = True
     page: int
     page_size: int
     total: int
     rows: List[FileRow]
+    next_cursor: Optional[str] = None
 
 class InsertFilePayload(BaseModel):
     """Payload for inserting a file path."""
@@ -203,26 +371,137 @@ class SimilarOut(BaseModel):
 
 # ---------- Helpers ----------
 
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# Characters of each report/notes column fetched for listings. Previews only
+# need the first line, capped by ``_preview``, so the full text stays in SQLite.
+PREVIEW_HEAD_CHARS = 200
+
+LIST_COLUMNS_SQL = f"""
+    id, path_rel, selected, planned_dest, final_dest, created_at, updated_at,
+    substr(file_report, 1, {PREVIEW_HEAD_CHARS}) AS file_report_head,
+    substr(organization_notes, 1, {PREVIEW_HEAD_CHARS}) AS organization_notes_head,
+    IFNULL(file_report, '') NOT IN ('', {", ".join(_sql_literal(s) for s in PROCESSING_SENTINELS)})
+        AS has_file_report,
+    IFNULL(organization_notes, '') <> '' AS has_organization_notes
+"""
+
+# Every boundary ``str.splitlines`` recognises.
+_LINE_BREAK_RE = re.compile(r"[\r\n\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+
+
 def _preview(s: Optional[str], n=140) -> Optional[str]:
     if not s:
         return None
-    first_line = s.splitlines()[0]
+    # Cut at the first line break rather than splitting the whole text.
+    end = _LINE_BREAK_RE.search(s)
+    first_line = s if end is None else s[: end.start()]
     return (first_line[: n - 1] + "…") if len(first_line) > n else first_line
 
-def _row_to_file_row(r) -> FileRow:
-    return FileRow(
-        id=int(r["id"]),
-        path_rel=r["path_rel"],
-        selected=bool(r["selected"]),
-        file_report_preview=_preview(r["file_report"]),
-        organization_notes_preview=_preview(r["organization_notes"]),
-        planned_dest=r["planned_dest"],
-        organized_path=r["final_dest"],
-        created_at=r["created_at"],
-        updated_at=r["updated_at"],
-        has_file_report=bool(r["file_report"] and r["file_report"] not in PROCESSING_SENTINELS),
-        has_organization_notes=bool(r["organization_notes"]),
-    )
+
+def _row_to_file_dict(r) -> Dict[str, Any]:
+    """Return the :class:`FileRow` fields for a :data:`LIST_COLUMNS_SQL` row."""
+
+    return {
+        "id": int(r["id"]),
+        "path_rel": r["path_rel"],
+        "selected": bool(r["selected"]),
+        "file_report_preview": _preview(r["file_report_head"]),
+        "organization_notes_preview": _preview(r["organization_notes_head"]),
+        "planned_dest": r["planned_dest"],
+        "organized_path": r["final_dest"],
+        "created_at": r["created_at"],
+        "updated_at": r["updated_at"],
+        "has_file_report": bool(r["has_file_report"]),
+        "has_organization_notes": bool(r["has_organization_notes"]),
+    }
+
+
+def _search_filter(q: Optional[str]) -> tuple[List[str], Dict[str, Any]]:
+    """Return ``WHERE`` clauses and parameters matching the search text ``q``."""
+
+    where: List[str] = []
+    params: Dict[str, Any] = {}
+    if q and db.has_fts and len(q) >= FTS_MIN_QUERY_LENGTH:
+        where.append("id IN (SELECT rowid FROM files_fts WHERE files_fts MATCH :q)")
+        # Quote the text as a single FTS5 string so it matches as a substring.
+        params["q"] = '"' + q.replace('"', '""') + '"'
+    elif q:
+        where.append(
+            (
+                "(LOWER(path_rel) LIKE :q OR LOWER(file_report) LIKE :q OR "
+                "LOWER(organization_notes) LIKE :q OR "
+                "LOWER(IFNULL(planned_dest,'')) LIKE :q OR "
+                "LOWER(IFNULL(final_dest,'')) LIKE :q)"
+            )
+        )
+        params["q"] = f"%{q.lower()}%"
+    return where, params
+
+
+def _found_or_404(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``result`` unless it reports an unknown file id, then raise 404.
+
+    Only :class:`UnknownFileError` maps to 404. A plain ``KeyError`` is a bug
+    in the lookup itself and becomes a 500; other failures are returned as is.
+    """
+
+    if not result.get("ok", True):
+        if result.get("error_type") == UnknownFileError.__name__:
+            raise HTTPException(status_code=404, detail="Not found")
+        if result.get("error_type") == KeyError.__name__:
+            raise HTTPException(status_code=500, detail=result.get("error"))
+    return result
+
+
+def _dumps_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _encode_cursor(order_by: str, order_dir: str, value: Any, file_id: int) -> str:
+    """Return an opaque keyset cursor for the row ``(value, file_id)``."""
+
+    raw = json.dumps([order_by, order_dir, value, file_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, order_by: str, order_dir: str) -> tuple[Any, int]:
+    """Decode a cursor from :func:`_encode_cursor`.
+
+    Parameters
+    ----------
+    cursor:
+        Value previously returned as ``next_cursor``.
+    order_by, order_dir:
+        Ordering of the current request; the cursor must have been issued for
+        the same ordering.
+
+    Returns
+    -------
+    tuple
+        The sort key value and file id of the last row already seen.
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed or belongs to a different ordering.
+    """
+
+    try:
+        cur_by, cur_dir, value, file_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if (cur_by, cur_dir) != (order_by, order_dir):
+        raise ValueError("cursor does not match the requested ordering")
+    return value, int(file_id)
 
 
 def _clean_decider_output(raw_output: str) -> str:
@@ -302,6 +581,117 @@ def _looks_like_path(value: str) -> bool:
     return "." in filename
 
 
+def _iter_scan_paths(base_dir_abs: str, recursive: bool) -> Iterator[str]:
+    """Yield the paths of the files under ``base_dir_abs``.
+
+    Parameters
+    ----------
+    base_dir_abs:
+        Absolute directory to scan.
+    recursive:
+        Descend into sub-directories when ``True``.
+
+    Yields
+    ------
+    str
+        File paths relative to ``base_dir_abs``, using ``/`` separators.
+
+    Notes
+    -----
+    Directories are read with :func:`os.scandir`, whose entries carry their
+    file type, and relative paths are sliced off a fixed prefix instead of
+    going through :func:`os.path.relpath`. As with :func:`os.walk`, symlinked
+    directories are not followed and unreadable directories are skipped.
+    Extensions are not checked here; :meth:`AgentVectorDB.insert_many` skips
+    unsupported files while inserting each batch.
+    """
+
+    prefix_len = len(base_dir_abs.rstrip(os.sep) + os.sep)
+    stack = [base_dir_abs]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if recursive and not entry.is_symlink():
+                            stack.append(entry.path)
+                        continue
+                    rel = entry.path[prefix_len:]
+                    if os.sep != "/":
+                        rel = rel.replace(os.sep, "/")
+                    yield rel
+        except OSError as exc:
+            logger.warning("Unable to scan %s: %s", exc.filename, exc)
+
+
+def _do_scan(
+    base_dir_abs: str, recursive: bool, cancel_event: threading.Event
+) -> Dict[str, int]:
+    """Insert scanned paths batch by batch, then reset the run state.
+
+    Runs after the ``scan`` action has responded, and can be called directly
+    by in-process callers that started the ``scan`` action themselves. A
+    reader thread lists the next batch of paths while the current one is
+    inserted, so directory I/O overlaps with database writes and at most two
+    batches are held at once.
+
+    Parameters
+    ----------
+    base_dir_abs:
+        Absolute directory to scan.
+    recursive:
+        Descend into sub-directories when ``True``.
+    cancel_event:
+        The scan run's own :attr:`RunState.cancel_event`, captured when the
+        action started. It is checked between batches, and the run state is
+        only reset afterwards if it still belongs to this scan.
+
+    Returns
+    -------
+    dict
+        Counts of newly ``inserted`` paths and of paths ``skipped`` for
+        unsupported extensions. When a batch fails to insert, the scan stops
+        there and the error is logged and left in the run's status text.
+    """
+
+    inserted = skipped = 0
+    final_status = "Idle"
+    try:
+        pending = _iter_scan_paths(base_dir_abs, recursive)
+
+        def read_batch() -> List[str]:
+            return list(islice(pending, SCAN_BATCH_SIZE))
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-reader") as reader:
+            next_batch = reader.submit(read_batch)
+            while not cancel_event.is_set():
+                batch = next_batch.result()
+                if not batch:
+                    break
+                next_batch = reader.submit(read_batch)
+                result = db.insert_many(batch)
+                if not result["ok"]:
+                    final_status = f"Scan failed: {result['error']}"
+                    logger.error(
+                        "Scan of %s stopped after inserting %s files: %s",
+                        base_dir_abs,
+                        inserted,
+                        result["error"],
+                    )
+                    break
+                inserted += result.get("inserted", 0)
+                skipped += result.get("skipped", 0)
+        logger.info(
+            "Scan of %s added %s files; %s skipped for unsupported extensions",
+            base_dir_abs,
+            inserted,
+            skipped,
+        )
+    finally:
+        runstate.finish(cancel_event, final_status)
+    return {"inserted": inserted, "skipped": skipped}
+
+
 def _analyze_pending_files(base_dir: str) -> None:
     """Generate file reports for all files missing analysis.
 
@@ -481,13 +871,20 @@ def _move_pending_files(base_dir: str, target_dir: str, dont_delete: bool) -> No
 # ---------- Config ----------
 @app.get("/api/config", response_model=ConfigOut)
 def get_config():
+    version = _data_version()
+    cached = _response_cache.get(("config",), version)
+    if cached is not None:
+        return cached
     base = db.get_base_dir()
-    return {
+    payload = {
         "ok": True,
-        "config": db.config,
+        "config": dict(db.config),
         "base_dir": base["base_dir"],
         "target_dir": db.config.get("target_dir"),
     }
+    if version is not None and _data_version() == version:
+        _response_cache.put(("config",), version, payload)
+    return payload
 
 # --- Native folder picker (local-only) ---
 @app.get("/api/pick_folder", response_model=Dict[str, Any])
@@ -512,17 +909,18 @@ def pick_folder():
 
 @app.put("/api/config", response_model=ConfigOut)
 def put_config(payload: ConfigUpdate):
-    if payload.base_dir:
-        db.save_config(base_dir=payload.base_dir)
-    if payload.target_dir:
-        db.save_config(target_dir=payload.target_dir)
-    if payload.instructions is not None:
-        db.save_config(instructions=payload.instructions)
-    # you can also persist recursive/dont_delete if you store them in config
-    if payload.recursive is not None:
-        db.save_config(recursive=payload.recursive)
-    if payload.dont_delete is not None:
-        db.save_config(dont_delete=payload.dont_delete)
+    # Explicit nulls mean "leave unchanged", like fields that were not sent.
+    updates = {
+        key: value
+        for key, value in payload.model_dump(exclude_unset=True).items()
+        if value is not None
+    }
+    # Empty directory fields mean "leave unchanged", as the UI always sends both.
+    for key in ("base_dir", "target_dir"):
+        if not updates.get(key):
+            updates.pop(key, None)
+    if updates:
+        db.save_config(**updates)
     base = db.get_base_dir()
     return {
         "ok": True,
@@ -538,24 +936,33 @@ def reset(payload: ResetPayload):
 # ---------- Status / single action ----------
 @app.get("/api/status", response_model=StatusOut)
 def status():
-    return {
+    global _status_cache  # pylint: disable=global-statement
+    rs = runstate.snapshot()
+    cached = _status_cache
+    if cached is not None and cached[0] is rs:
+        return cached[1]
+    payload = {
         "ok": True,
-        "current_action": runstate.current_action,
-        "status_text": runstate.status_text,
+        "current_action": rs.current_action,
+        "status_text": rs.status_text,
         "started_at": (
-            datetime.utcfromtimestamp(runstate.started_at).isoformat()
-            if runstate.started_at
+            datetime.utcfromtimestamp(rs.started_at).isoformat()
+            if rs.started_at
             else None
         ),
     }
+    # Every state change swaps the snapshot, so identity is an exact key.
+    _status_cache = (rs, payload)
+    return payload
 
 @app.post("/api/actions/{action}", response_model=StatusOut)
 def start_action(
     action: Literal["scan", "analyze", "plan", "decide", "move"],
+    background_tasks: BackgroundTasks,
     payload: Optional[ScanPayload] = None,
 ):
     try:
-        runstate.start(action)
+        cancel_event = runstate.start(action)
     except RuntimeError as e:  # pragma: no cover - networking
         raise HTTPException(status_code=409, detail=str(e)) from e
 
@@ -570,18 +977,9 @@ def start_action(
             runstate.stop()
             raise HTTPException(status_code=400, detail="base_dir not set")
         db.save_config(base_dir=base_dir, recursive=recursive)
-        base_dir_abs = os.path.abspath(base_dir)
-        for root, _dirs, files in os.walk(base_dir_abs):
-            for fname in files:
-                rel = os.path.relpath(os.path.join(root, fname), base_dir_abs)
-                if not db.is_allowed_file(rel):
-                    logger.debug("Skipping unsupported file extension for %s", rel)
-                    continue
-                db.insert(rel)
-            if not recursive:
-                break
-        runstate.stop()
-        runstate.status_text = "Idle"
+        background_tasks.add_task(
+            _do_scan, os.path.abspath(base_dir), recursive, cancel_event
+        )
         return status()
 
     if action == "analyze":
@@ -686,72 +1084,132 @@ def stop_all():
     return status()
 
 # ---------- Files / table ----------
-@app.get("/api/files", response_model=FilesListOut)
-def list_files(
+# Read-only endpoints are ``async`` and push their queries to worker threads,
+# where each thread has its own reader connection; writes stay synchronous.
+@app.get("/api/files", response_model=None, responses={200: {"model": FilesListOut}})
+async def list_files(
     q: Optional[str] = None,
     page: int = 1,
     page_size: int = 50,
     order_by: Literal["path_rel", "created_at", "updated_at"] = "updated_at",
     order_dir: Literal["asc", "desc"] = "desc",
+    cursor: Optional[str] = None,
 ):
     page = max(1, page)
     page_size = max(1, min(200, page_size))
     offset = (page - 1) * page_size
 
-    where = []
-    params: Dict[str, Any] = {}
-    if q:
-        where.append(
-            (
-                "(LOWER(path_rel) LIKE :q OR LOWER(file_report) LIKE :q OR "
-                "LOWER(organization_notes) LIKE :q OR "
-                "LOWER(IFNULL(planned_dest,'')) LIKE :q OR "
-                "LOWER(IFNULL(final_dest,'')) LIKE :q)"
-            )
-        )
-        params["q"] = f"%{q.lower()}%"
+    cache_key = ("files", q, page, page_size, order_by, order_dir, cursor)
+    version = _data_version()
+    cached = _response_cache.get(cache_key, version)
+    if cached is not None:
+        return _json_response(cached)
 
+    where, params = _search_filter(q)
     where_sql = ("WHERE " + " AND ".join(where)) if where else ""
-    order_sql = f"ORDER BY {order_by} {order_dir.upper()}"
+    order_sql = f"ORDER BY {order_by} {order_dir.upper()}, id {order_dir.upper()}"
 
-    total = db.conn.execute(f"SELECT COUNT(*) as c FROM files {where_sql}", params).fetchone()["c"]
-    rows = db.conn.execute(
+    # With a cursor, seek past the last row seen instead of skipping ``offset``.
+    page_where = list(where)
+    if cursor:
+        try:
+            cursor_value, cursor_id = _decode_cursor(cursor, order_by, order_dir)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        op = "<" if order_dir == "desc" else ">"
+        page_where.append(f"({order_by}, id) {op} (:cursor_value, :cursor_id)")
+        params.update(cursor_value=cursor_value, cursor_id=cursor_id)
+        offset = 0
+    page_where_sql = ("WHERE " + " AND ".join(page_where)) if page_where else ""
+
+    # A search has to visit every match anyway, so a window count totals them
+    # in the same pass. Unfiltered pages keep the index seek and LIMIT early
+    # exit, and cursor pages only see the rows past the cursor, so both count
+    # separately.
+    windowed = bool(where) and not cursor
+    total_sql = ", COUNT(*) OVER () AS total" if windowed else ""
+    rows = await asyncio.to_thread(
+        db.fetch_all,
         f"""
-        SELECT id, path_rel, selected, file_report, organization_notes, planned_dest, final_dest,
-               created_at, updated_at
+        SELECT {LIST_COLUMNS_SQL}{total_sql}
         FROM files
-        {where_sql}
+        {page_where_sql}
         {order_sql}
         LIMIT :limit OFFSET :offset
         """,
         {**params, "limit": page_size, "offset": offset},
-    ).fetchall()
-
-    return {
+    )
+    if windowed and rows:
+        total = rows[0]["total"]
+    else:
+        total = (
+            await asyncio.to_thread(
+                db.fetch_one, f"SELECT COUNT(*) as c FROM files {where_sql}", params
+            )
+        )["c"]
+    next_cursor = None
+    if len(rows) == page_size:
+        last = rows[-1]
+        next_cursor = _encode_cursor(order_by, order_dir, last[order_by], int(last["id"]))
+
+    # Rows are plain dicts shaped like ``FileRow`` and encoded directly; the
+    # model only documents the response in the OpenAPI schema.
+    body = _dumps_json({
         "ok": True,
         "page": page,
         "page_size": page_size,
         "total": int(total),
-        "rows": [_row_to_file_row(r) for r in rows],
-    }
+        "rows": [_row_to_file_dict(r) for r in rows],
+        "next_cursor": next_cursor,
+    })
+    if version is not None and _data_version() == version:
+        _response_cache.put(cache_key, version, body)
+    return _json_response(body)
+
+@app.get("/api/files/stream", response_class=StreamingResponse)
+def stream_files(
+    q: Optional[str] = None,
+    order_by: Literal["path_rel", "created_at", "updated_at"] = "path_rel",
+    order_dir: Literal["asc", "desc"] = "asc",
+):
+    """Export every matching file as newline-delimited JSON.
+
+    Intended for scripts; rows are read and encoded one at a time so memory
+    stays flat however many files match. The UI keeps using ``/api/files``.
+    """
+
+    where, params = _search_filter(q)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    rows = db.iter_rows(
+        f"""
+        SELECT id, path_rel, selected, file_report, organization_notes, planned_dest,
+               final_dest, created_at, updated_at
+        FROM files
+        {where_sql}
+        ORDER BY {order_by} {order_dir.upper()}, id {order_dir.upper()}
+        """,
+        params,
+    )
+    lines = (_dumps_json({**dict(r), "selected": bool(r["selected"])}) + b"\n" for r in rows)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 @app.get("/api/files/{file_id}", response_model=FileRowFull)
-def get_file(file_id: int):
-    r = db.conn.execute("SELECT * FROM files WHERE id=?", (file_id,)).fetchone()
+async def get_file(file_id: int):
+    r = await asyncio.to_thread(db.fetch_one, "SELECT * FROM files WHERE id=?", (file_id,))
     if not r:
         raise HTTPException(status_code=404, detail="Not found")
-    return {
-        "ok": True,
-        "id": int(r["id"]),
-        "path_rel": r["path_rel"],
-        "selected": bool(r["selected"]),
-        "file_report": r["file_report"],
-        "organization_notes": r["organization_notes"],
-        "planned_dest": r["planned_dest"],
-        "organized_path": r["final_dest"],
-        "created_at": r["created_at"],
-        "updated_at": r["updated_at"],
-    }
+    return FileRowFull.model_construct(
+        ok=True,
+        id=int(r["id"]),
+        path_rel=r["path_rel"],
+        selected=bool(r["selected"]),
+        file_report=r["file_report"],
+        organization_notes=r["organization_notes"],
+        planned_dest=r["planned_dest"],
+        organized_path=r["final_dest"],
+        created_at=r["created_at"],
+        updated_at=r["updated_at"],
+    )
 
 @app.post("/api/files", response_model=Dict[str, Any])
 def insert_file(payload: InsertFilePayload):
@@ -761,19 +1219,12 @@ def insert_file(payload: InsertFilePayload):
 
 @app.put("/api/files/{file_id}/planned_dest", response_model=Dict[str, Any])
 def set_planned_dest(file_id: int, payload: PlannedDestUpdate):
-    r = db.conn.execute("SELECT path_rel FROM files WHERE id=?", (file_id,)).fetchone()
-    if not r:
-        raise HTTPException(status_code=404, detail="Not found")
-    # use OOP helper (by path)
-    return db.set_planned_destination(r["path_rel"], payload.planned_dest)
+    return _found_or_404(db.set_planned_destination_by_id(file_id, payload.planned_dest))
 
 
 @app.put("/api/files/{file_id}/selected", response_model=Dict[str, Any])
 def set_selected(file_id: int, payload: SelectionUpdate):
-    r = db.conn.execute("SELECT path_rel FROM files WHERE id=?", (file_id,)).fetchone()
-    if not r:
-        raise HTTPException(status_code=404, detail="Not found")
-    return db.set_selected(r["path_rel"], payload.selected)
+    return _found_or_404(db.set_selected_by_id(file_id, payload.selected))
 
 
 @app.post("/api/files/selection", response_model=Dict[str, Any])
@@ -786,26 +1237,26 @@ def set_selection_all(payload: SelectionAllUpdate):
     return db.set_selected_all(payload.selected)
 
 @app.get("/api/files/{file_id}/report", response_model=Dict[str, Any])
-def get_report(file_id: int):
-    r = db.conn.execute("SELECT path_rel FROM files WHERE id=?", (file_id,)).fetchone()
+async def get_report(file_id: int):
+    r = await asyncio.to_thread(
+        db.fetch_one, "SELECT file_report FROM files WHERE id=?", (file_id,)
+    )
     if not r:
         raise HTTPException(status_code=404, detail="Not found")
-    out = db.get_file_report(r["path_rel"])
-    return {"ok": True, "file_report": out.get("file_report")}
+    return {"ok": True, "file_report": r["file_report"]}
 
 @app.get("/api/files/{file_id}/notes", response_model=Dict[str, Any])
-def get_notes(file_id: int):
-    r = db.conn.execute("SELECT organization_notes FROM files WHERE id=?", (file_id,)).fetchone()
+async def get_notes(file_id: int):
+    r = await asyncio.to_thread(
+        db.fetch_one, "SELECT organization_notes FROM files WHERE id=?", (file_id,)
+    )
     if not r:
         raise HTTPException(status_code=404, detail="Not found")
     return {"ok": True, "organization_notes": r["organization_notes"]}
 
 @app.put("/api/files/{file_id}/file_report", response_model=Dict[str, Any])
 def put_file_report(file_id: int, payload: FileReportUpdate):
-    r = db.conn.execute("SELECT path_rel FROM files WHERE id=?", (file_id,)).fetchone()
-    if not r:
-        raise HTTPException(status_code=404, detail="Not found")
-    return db.set_file_report(r["path_rel"], payload.file_report)
+    return _found_or_404(db.set_file_report_by_id(file_id, payload.file_report))
 
 @app.post("/api/files/notes/append", response_model=Dict[str, Any])
 def append_notes(payload: NotesAppend):
@@ -813,11 +1264,10 @@ def append_notes(payload: NotesAppend):
 
 # ---------- Similarity ----------
 @app.get("/api/files/{file_id}/similar", response_model=SimilarOut)
-def similar(file_id: int, top_k: int = 10):
-    r = db.conn.execute("SELECT path_rel FROM files WHERE id=?", (file_id,)).fetchone()
-    if not r:
-        raise HTTPException(status_code=404, detail="Not found")
-    return db.find_similar_file_reports(r["path_rel"], top_k=top_k)
+async def similar(file_id: int, top_k: int = 10):
+    return _found_or_404(
+        await asyncio.to_thread(db.find_similar_file_reports_by_id, file_id, top_k=top_k)
+    )
 
 # ---------- Run ----------
 # uvicorn foldermate.app:app --host 127.0.0.1 --port 8000 --reload
@@ -10,10 +10,17 @@ from typing import Any, Dict
 
 import uvicorn  # pylint: disable=import-error
 
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None  # type: ignore[assignment]
+
 LOGGER = logging.getLogger(__name__)
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 8000
 DEFAULT_CONFIG_NAME = "organizer.config.json"
+DEFAULT_WORKERS = 1
+LOG_LEVELS = ("critical", "error", "warning", "info", "debug", "trace")
 
 
 def load_config(config_path: Path) -> Dict[str, Any]:
@@ -36,8 +43,12 @@ def load_config(config_path: Path) -> Dict[str, Any]:
     """
 
     try:
-        with config_path.open("r", encoding="utf-8") as handle:
-            return json.load(handle)
+        raw = config_path.read_bytes()
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one branch
+        # below covers both parsers.
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
     except FileNotFoundError as exc:  # pragma: no cover - defensive guard
         raise SystemExit(f"Configuration file not found: {config_path}") from exc
     except json.JSONDecodeError as exc:
@@ -64,6 +75,26 @@ def build_parser() -> argparse.ArgumentParser:
         default=DEFAULT_CONFIG_NAME,
         help="Path to organizer.config.json.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=(
+            "Number of worker processes. Each opens its own database connection; "
+            "action state is per process, so keep 1 when using the UI."
+        ),
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="Restart the server when source files change (development only).",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=LOG_LEVELS,
+        default="info",
+        help="Uvicorn log level.",
+    )
     return parser
 
 
@@ -81,7 +112,21 @@ def main(argv: list[str] | None = None) -> None:
     else:
         LOGGER.info("Loaded configuration from %s", config_path)
 
-    uvicorn.run("foldermate.app:app", host=args.host, port=args.port)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.reload and args.workers > 1:
+        parser.error("--reload cannot be combined with --workers > 1")
+
+    # The app is passed as an import string so every worker process imports it,
+    # and with it opens its own SQLite connection, after the fork.
+    uvicorn.run(
+        "foldermate.app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload,
+        log_level=args.log_level,
+    )
 
 
 if __name__ == "__main__":
@@ -1,3 +1,72 @@
+"""Shared pytest setup and fixtures."""
+
 import os
 import sys
+from types import SimpleNamespace
+
+import pytest
+
+from fakes import FakeEmbedder
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    """Create ``base`` and ``target`` directories under ``tmp_path``.
+
+    Returns a namespace with both directories and an unused ``config`` path
+    beside them.
+    """
+
+    base = tmp_path / "base"
+    target = tmp_path / "target"
+    for path in (base, target):
+        os.makedirs(path, exist_ok=True)
+    return SimpleNamespace(base=base, target=target, config=tmp_path / "config.json")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _session_cwd(tmp_path_factory):
+    """Run each session, and so each xdist worker, from its own directory.
+
+    ``foldermate.app`` opens ``organizer.config.json`` and its database relative
+    to the working directory on import. Without this, every test run and every
+    parallel worker would share one ``organizer.sqlite`` in the repository root.
+    """
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("cwd"))
+        yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _fake_text_embedding():
+    """Replace the fastembed model with :class:`FakeEmbedder` for the whole run.
+
+    Tests needing different vectors still patch ``TextEmbedding`` themselves;
+    function-scoped patches are undone back to this default.
+    """
+
+    import agent_utils.agent_vector_db as avdb  # pylint: disable=import-outside-toplevel
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(avdb, "TextEmbedding", FakeEmbedder)
+        yield
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """Return ``foldermate.app`` with its database and run state restored afterwards.
+
+    Tests install their own database with :func:`foldermate.app.set_db`
+    instead of reloading the module, which would rebuild the app and its
+    default database on every test.
+    """
+
+    import foldermate.app as module  # pylint: disable=import-outside-toplevel
+
+    previous_db = module.db
+    monkeypatch.setattr(module, "runstate", module.RunState())
+    yield module
+    module.set_db(previous_db)
@@ -0,0 +1,61 @@
+"""Test doubles and settings shared by the test modules."""
+
+import numpy as np
+
+# Test databases are throwaway, so commits skip the fsync.
+TEST_DB_CONFIG = {"sqlite": {"synchronous": "OFF"}}
+
+_ZERO_VECTOR = np.zeros(3, dtype=np.float32)
+
+
+def char_stats(texts):
+    """Return character counts and code point sums for ``texts`` in one pass."""
+
+    texts = list(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    running = np.concatenate(([0], np.cumsum(codes, dtype=np.int64)))
+    ends = np.cumsum(lengths)
+    return lengths, running[ends] - running[ends - lengths]
+
+
+def fake_vectors(texts):
+    """Deterministic 3-d vectors derived from each text's characters."""
+
+    lengths, sums = char_stats(texts)
+    return np.stack([lengths, sums % 97, (lengths * sums) % 53], axis=1).astype(np.float32)
+
+
+class FakeEmbedder:
+    """Stand-in for ``fastembed.TextEmbedding`` with deterministic vectors.
+
+    Vectors depend only on the text, so they are memoised across instances and
+    tests; each distinct string is computed once per session.
+    """
+
+    _cache: dict[str, np.ndarray] = {}
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name
+
+    def embed(self, texts):
+        texts = list(texts)
+        cache = FakeEmbedder._cache
+        missing = list(dict.fromkeys(t for t in texts if t not in cache))
+        if missing:
+            cache.update(zip(missing, fake_vectors(missing)))
+        if not texts:
+            return np.empty((0, 3), dtype=np.float32)
+        return np.stack([cache[t] for t in texts])
+
+
+class ZeroEmbedder:  # pylint: disable=too-few-public-methods
+    """Stand-in for ``fastembed.TextEmbedding`` returning a zero vector per text."""
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name
+
+    def embed(self, texts):
+        # A read-only broadcast view: one shared zero row, no per-call allocation.
+        texts = list(texts)
+        return np.broadcast_to(_ZERO_VECTOR, (len(texts), _ZERO_VECTOR.size))
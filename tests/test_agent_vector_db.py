@@ -5,18 +5,11 @@ import json
 import sqlite3
 import threading
 
+import numpy as np
+import pytest
 
-class FakeEmbedder:
-    def __init__(self, model_name=None):
-        pass
-
-    def embed(self, texts):
-        vectors = []
-        for t in texts:
-            l = len(t)
-            s = sum(ord(c) for c in t)
-            vectors.append([float(l), float(s % 97), float((l * s) % 53)])
-        return vectors
+import agent_utils.agent_vector_db as avdb
+from fakes import FakeEmbedder, char_stats, fake_vectors
 
 
 class FakeEmbedderWide:
@@ -26,19 +19,11 @@ class FakeEmbedderWide:
         pass
 
     def embed(self, texts):
-        vectors = []
-        for t in texts:
-            length = len(t)
-            total = sum(ord(c) for c in t)
-            vectors.append(
-                [
-                    float(length),
-                    float(total % 97),
-                    float((length * total) % 53),
-                    float((length + total) % 71),
-                ]
-            )
-        return vectors
+        lengths, totals = char_stats(texts)
+        return np.stack(
+            [lengths, totals % 97, (lengths * totals) % 53, (lengths + totals) % 71],
+            axis=1,
+        ).astype(np.float32)
 
 
 class FailingEmbedder:
@@ -51,20 +36,13 @@ class FailingEmbedder:
         self._calls += 1
         if self._calls > 1:
             raise RuntimeError("boom")
-        vectors = []
-        for t in texts:
-            l = len(t)
-            s = sum(ord(c) for c in t)
-            vectors.append([float(l), float(s % 97), float((l * s) % 53)])
-        return vectors
+        return fake_vectors(texts)
 
 
-def test_agent_vector_db(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_agent_vector_db(tmp_path, dirs):
     config_path = tmp_path / "config.json"
     db = AgentVectorDB(config_path=str(config_path))
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     assert db.reset_db(str(base_dir))["ok"]
     assert db.get_base_dir()["base_dir"] == str(base_dir)
 
@@ -120,18 +98,16 @@ def test_agent_vector_db(tmp_path, monkeypatch):
     assert db.save_config(search={"top_k": 5})["ok"]
 
 
-def test_rebuild_vector_tables_on_dimension_change(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_rebuild_vector_tables_on_dimension_change(tmp_path, dirs, monkeypatch):
     config_path = tmp_path / "dim.json"
     db = AgentVectorDB(config_path=str(config_path))
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     db.reset_db(str(base_dir))
     db.insert("foo.txt")
     db.set_file_report("foo.txt", "alpha report")
     db.append_organization_anchor_notes("foo.txt", "first note")
 
-    db.conn.close()
+    db.close()
 
     monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedderWide)
     rebuilt = AgentVectorDB(config_path=str(config_path))
@@ -147,8 +123,37 @@ def test_rebuild_vector_tables_on_dimension_change(tmp_path, monkeypatch):
     assert sim["results"]
     assert sim["results"][0]["path_rel"] == "foo.txt"
 
-def test_clear_processing_file_reports(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_vector_storage_type_switch_rebuilds_tables(tmp_path, dirs):
+    """Embeddings default to int8 storage and can be switched to float32."""
+
+    config_path = tmp_path / "quant.json"
+    db = AgentVectorDB(config_path=str(config_path))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+    db.insert("foo.txt")
+    db.insert("bar.txt")
+    db.set_file_report("foo.txt", "alpha report")
+    db.set_file_report("bar.txt", "beta notes")
+
+    stored = db.conn.execute("SELECT embedding FROM vec_file_report LIMIT 1").fetchone()
+    assert len(stored["embedding"]) == db._dim  # one byte per dimension
+    int8_sim = db.find_similar_file_reports("foo.txt")["results"]
+    db.close()
+
+    config = json.loads(config_path.read_text())
+    config["search"]["vector_type"] = "float32"
+    config_path.write_text(json.dumps(config))
+    rebuilt = AgentVectorDB(config_path=str(config_path))
+
+    stored = rebuilt.conn.execute("SELECT embedding FROM vec_file_report LIMIT 1").fetchone()
+    assert len(stored["embedding"]) == 4 * rebuilt._dim
+    float_sim = rebuilt.find_similar_file_reports("foo.txt")["results"]
+    assert [r["path_rel"] for r in float_sim] == [r["path_rel"] for r in int8_sim]
+    for quantised, exact in zip(int8_sim, float_sim):
+        assert abs(quantised["similarity_score"] - exact["similarity_score"]) < 0.01
+
+
+def test_clear_processing_file_reports(tmp_path):
     config_path = tmp_path / "cfg.json"
     db = AgentVectorDB(config_path=str(config_path))
     base_dir = tmp_path / "b"
@@ -163,12 +168,10 @@ def test_clear_processing_file_reports(tmp_path, monkeypatch):
     assert db.get_next_path_missing_file_report()["path_rel"] == "foo.txt"
 
 
-def test_prepend_and_remove_sentinel(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_prepend_and_remove_sentinel(tmp_path, dirs):
     config_path = tmp_path / "sent.cfg"
     db = AgentVectorDB(config_path=str(config_path))
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     db.reset_db(str(base_dir))
     inserted = db.insert("note.txt")
     db.append_organization_cluser_notes([inserted["id"]], "note1")
@@ -181,12 +184,13 @@ def test_prepend_and_remove_sentinel(tmp_path, monkeypatch):
     assert any("note1" in line for line in remaining)
 
 
-def test_set_file_report_handles_embedding_failure(tmp_path, monkeypatch):
+def test_set_file_report_handles_embedding_failure(tmp_path, dirs, monkeypatch):
     monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FailingEmbedder)
+    # FailingEmbedder counts calls per instance, so start from a fresh model.
+    avdb._shared_embedder.cache_clear()
     config_path = tmp_path / "f.cfg"
     db = AgentVectorDB(config_path=str(config_path))
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     db.reset_db(str(base_dir))
     db.insert("foo.txt")
 
@@ -196,8 +200,30 @@ def test_set_file_report_handles_embedding_failure(tmp_path, monkeypatch):
     assert db.get_file_report("foo.txt")["file_report"] == "hello"
 
 
-def test_set_file_report_retries_on_locked(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_set_file_reports_writes_batch_and_replaces_vectors(tmp_path, dirs):
+    db = AgentVectorDB(config_path=str(tmp_path / "bulk.cfg"))
+    db.reset_db(str(dirs.base))
+    ids = db.insert_many(["a.txt", "b.txt"], with_ids=True)["ids"]
+    db.set_file_report("a.txt", "old report")
+
+    res = db.set_file_reports(
+        [("a.txt", "first"), ("b.txt", "second"), ("gone.txt", "x"), ("a.txt", "new report")]
+    )
+
+    assert res == {"ok": True, "ids": ids, "missing": ["gone.txt"]}
+    assert db.get_file_report("a.txt")["file_report"] == "new report"
+    assert db.get_file_report("b.txt")["file_report"] == "second"
+    stored = db.conn.execute(
+        "SELECT embedding FROM vec_file_report WHERE file_id=?", (ids["a.txt"],)
+    ).fetchall()
+    assert len(stored) == 1
+    assert np.array_equal(
+        np.frombuffer(stored[0]["embedding"], dtype=np.int8), db._embed_doc("new report")
+    )
+    assert not db.set_file_reports([("a.txt", " ")])["ok"]
+
+
+def test_set_file_report_retries_on_locked(tmp_path):
     config_path = tmp_path / "retry.cfg"
     db = AgentVectorDB(config_path=str(config_path))
     base_dir = tmp_path / "b"
@@ -214,10 +240,9 @@ def test_set_file_report_retries_on_locked(tmp_path, monkeypatch):
     assert db.get_file_report("foo.txt")["file_report"] == "hello"
 
 
-def test_get_file_id(tmp_path, monkeypatch):
+def test_get_file_id(tmp_path):
     """Ensure file identifiers can be retrieved without modifying rows."""
 
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
     config_path = tmp_path / "id.cfg"
     db = AgentVectorDB(config_path=str(config_path))
     base_dir = tmp_path / "b"
@@ -229,12 +254,10 @@ def test_get_file_id(tmp_path, monkeypatch):
     assert res["id"] == inserted["id"]
 
 
-def test_planned_destination_folders_for_proposed(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_planned_destination_folders_for_proposed(tmp_path, dirs):
     config_path = tmp_path / "plan.cfg"
     db = AgentVectorDB(config_path=str(config_path))
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     db.reset_db(str(base_dir))
     db.save_config(target_dir=str(base_dir))
 
@@ -260,14 +283,12 @@ def test_planned_destination_folders_for_proposed(tmp_path, monkeypatch):
     assert "/Personal/Health/InsuranceClaims" in res["folders"]
 
 
-def test_selection_filters_work_while_processing(tmp_path, monkeypatch):
+def test_selection_filters_work_while_processing(tmp_path, dirs):
     """Selection flags should control which files are processed next."""
 
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
     config_path = tmp_path / "sel.cfg"
     db = AgentVectorDB(config_path=str(config_path))
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     db.reset_db(str(base_dir))
 
     db.insert("alpha.txt")
@@ -311,3 +332,449 @@ def test_selection_filters_work_while_processing(tmp_path, monkeypatch):
     assert db.get_next_path_missing_final_destination()["path_rel"] == "beta.txt"
     db.set_selected("beta.txt", False)
     assert db.get_next_path_missing_final_destination()["path_rel"] is None
+
+
+class CountingEmbedder(FakeEmbedder):
+    """Embedder recording how many texts it has embedded."""
+
+    calls = 0
+
+    def embed(self, texts):
+        texts = list(texts)
+        CountingEmbedder.calls += len(texts)
+        return super().embed(texts)
+
+
+def test_find_similar_reuses_stored_embedding(tmp_path, dirs, monkeypatch):
+    """Similarity search should query with the stored vector, not re-embed."""
+
+    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", CountingEmbedder)
+    config_path = tmp_path / "sim.cfg"
+    db = AgentVectorDB(config_path=str(config_path))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+    db.insert("a.txt")
+    db.insert("b.txt")
+    db.set_file_report("a.txt", "hello world")
+    db.set_file_report("b.txt", "hello there")
+
+    before = CountingEmbedder.calls
+    sim = db.find_similar_file_reports("a.txt", top_k=2)
+    assert CountingEmbedder.calls == before
+    assert sim["results"][0]["path_rel"] == "a.txt"
+    assert sim["results"][0]["distance"] == 0.0
+
+
+def test_repeated_texts_are_embedded_once(tmp_path, dirs, monkeypatch):
+    """Identical report texts are served from the embedding cache."""
+
+    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", CountingEmbedder)
+    db = AgentVectorDB(config_path=str(tmp_path / "cache.cfg"))
+    db.reset_db(str(dirs.base))
+    db.insert_many(["a.txt", "b.txt", "c.txt"])
+
+    before = CountingEmbedder.calls
+    db.set_file_report("a.txt", "same report")
+    db.set_file_report("b.txt", "same report")
+    db.set_file_report("c.txt", "other report")
+    assert CountingEmbedder.calls - before == 2
+
+    vecs = db._embed_docs(["same report", "new", "new"])
+    assert CountingEmbedder.calls - before == 3
+    assert vecs[1] is vecs[2]
+    assert not vecs[0].flags.writeable
+
+
+def test_index_vector_conversion_is_row_wise(tmp_path):
+    db = AgentVectorDB(config_path=str(tmp_path / "conv.cfg"))
+    batch = np.array([[3.0, 4.0, 0.0], [0.0, 0.0, 0.0], [1.0, -1.0, 2.0]], dtype=np.float32)
+
+    converted = db._to_index_vector(batch)
+
+    assert converted.dtype == np.int8
+    for row, expected in zip(batch, converted):
+        assert np.array_equal(db._to_index_vector(row), expected)
+    assert not converted[1].any()
+
+
+def test_int8_quantisation_uses_full_range(tmp_path):
+    db = AgentVectorDB(config_path=str(tmp_path / "q.cfg"))
+    rng = np.random.default_rng(0)
+    batch = rng.standard_normal((8, 768)).astype(np.float32)
+
+    quantised = db._to_index_vector(batch).astype(np.float32)
+
+    assert np.array_equal(np.abs(quantised).max(axis=1), np.full(8, 127.0))
+    cosine = (quantised * batch).sum(axis=1) / (
+        np.linalg.norm(quantised, axis=1) * np.linalg.norm(batch, axis=1)
+    )
+    assert cosine.min() > 0.999
+
+
+def test_float32_index_vectors_are_unit_length(tmp_path):
+    config_path = tmp_path / "unit.cfg"
+    config_path.write_text(json.dumps({"search": {"vector_type": "float32"}}))
+    db = AgentVectorDB(config_path=str(config_path))
+
+    vecs = db._to_index_vector(np.array([[3.0, 4.0, 0.0], [0.0, 0.0, 0.0]]))
+
+    assert vecs.dtype == np.float32
+    assert np.allclose(vecs[0], [0.6, 0.8, 0.0])
+    assert not vecs[1].any()
+
+
+@pytest.mark.parametrize("vector_type, dtype", [("int8", np.int8), ("float32", np.float32)])
+def test_embeddings_are_stored_as_packed_blobs(tmp_path, dirs, vector_type, dtype):
+    """Vectors live in vec0 as raw little-endian blobs, never as JSON text."""
+
+    config_path = tmp_path / "blob.cfg"
+    config_path.write_text(json.dumps({"search": {"vector_type": vector_type}}))
+    db = AgentVectorDB(config_path=str(config_path))
+    db.reset_db(str(dirs.base))
+    file_id = db.insert("a.txt")["id"]
+    db.set_file_report("a.txt", "packed report")
+
+    blob = db.conn.execute(
+        "SELECT embedding FROM vec_file_report WHERE file_id=?", (file_id,)
+    ).fetchone()["embedding"]
+
+    assert isinstance(blob, bytes)
+    assert len(blob) == db._dim * np.dtype(dtype).itemsize
+    stored = np.frombuffer(blob, dtype=dtype)
+    assert np.array_equal(stored, db._embed_doc("packed report"))
+
+
+def test_embedding_model_is_shared_between_instances(tmp_path, monkeypatch):
+    first = AgentVectorDB(config_path=str(tmp_path / "one.cfg"))
+    second = AgentVectorDB(config_path=str(tmp_path / "two.cfg"))
+    assert first.embedder is second.embedder
+
+    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", CountingEmbedder)
+    patched = AgentVectorDB(config_path=str(tmp_path / "three.cfg"))
+    assert isinstance(patched.embedder, CountingEmbedder)
+
+
+class BatchRecordingEmbedder(FakeEmbedder):
+    """Embedder recording the size of every call."""
+
+    batches: list[int] = []
+
+    def embed(self, texts):
+        texts = list(texts)
+        BatchRecordingEmbedder.batches.append(len(texts))
+        if any("bad" in text for text in texts):
+            raise RuntimeError("cannot embed")
+        return super().embed(texts)
+
+
+def test_embeddings_are_requested_in_bounded_batches(tmp_path, dirs, monkeypatch):
+    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", BatchRecordingEmbedder)
+    config_path = tmp_path / "batch.cfg"
+    config_path.write_text(json.dumps({"search": {"embed_batch_size": 2}}))
+    db = AgentVectorDB(config_path=str(config_path))
+    db.reset_db(str(dirs.base))
+
+    BatchRecordingEmbedder.batches.clear()
+    db._embed_docs([f"text {i}" for i in range(5)])
+    assert BatchRecordingEmbedder.batches == [2, 2, 1]
+
+    names = ["a.txt", "b.txt", "c.txt"]
+    db.insert_many(names)
+    with db.conn:
+        db.conn.executemany(
+            "UPDATE files SET file_report=? WHERE path_rel=?",
+            [("good one", "a.txt"), ("bad one", "b.txt"), ("good two", "c.txt")],
+        )
+    db._embedding_cache = avdb.EmbeddingCache(0)
+    db._rebuild_vector_tables()
+    indexed = {row["path_rel"] for row in db.conn.execute("SELECT path_rel FROM vec_file_report")}
+    assert indexed == {"a.txt", "c.txt"}
+
+
+def test_embedding_cache_evicts_least_recently_used():
+    cache = avdb.EmbeddingCache(maxsize=2)
+    for text in ("a", "b"):
+        cache.put(text, np.zeros(2, dtype=np.float32))
+    assert cache.get("a") is not None
+    cache.put("c", np.zeros(2, dtype=np.float32))
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    assert cache.get("a") is cache.get("a")
+
+    disabled = avdb.EmbeddingCache(maxsize=0)
+    disabled.put("a", np.zeros(2, dtype=np.float32))
+    assert disabled.get("a") is None
+
+
+def test_similarity_search_is_driven_by_vector_index(tmp_path, dirs):
+    """The vec0 KNN scan runs first and only then are ``files`` rows fetched."""
+
+    db = AgentVectorDB(config_path=str(tmp_path / "knn.cfg"))
+    db.reset_db(str(dirs.base))
+    for i in range(3):
+        db.insert(f"f{i}.txt")
+        db.set_file_report(f"f{i}.txt", f"report {i}")
+    query = db.conn.execute("SELECT embedding FROM vec_file_report LIMIT 1").fetchone()[0]
+
+    plan = [
+        row["detail"]
+        for row in db.conn.execute(
+            "EXPLAIN QUERY PLAN " + db._sql_similar_reports, {"q": query, "k": 2}
+        )
+    ]
+    assert plan[0].startswith("SCAN v VIRTUAL TABLE")
+    assert plan[1].startswith("SEARCH f USING INTEGER PRIMARY KEY")
+
+
+def test_reader_connections_are_per_thread_and_read_only(tmp_path, dirs):
+    """Reads use a separate read-only connection for each thread."""
+
+    config_path = tmp_path / "reader.cfg"
+    db = AgentVectorDB(config_path=str(config_path))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+    db.insert("a.txt")
+
+    row = db.fetch_one("SELECT path_rel FROM files WHERE id=?", (1,))
+    assert row["path_rel"] == "a.txt"
+    assert db._reader() is not db.conn
+
+    other = []
+    worker = threading.Thread(target=lambda: other.append(db._reader()))
+    worker.start()
+    worker.join()
+    assert other[0] is not db._reader()
+
+    with pytest.raises(avdb.sqlite3.OperationalError):
+        db.fetch_all("DELETE FROM files")
+    assert db.fetch_one("SELECT COUNT(*) AS c FROM files")["c"] == 1
+
+
+def test_close_closes_every_reader(tmp_path, dirs):
+    """``close`` reaches the readers of other threads and open streams."""
+
+    db = AgentVectorDB(config_path=str(tmp_path / "close.cfg"))
+    db.reset_db(str(dirs.base))
+    db.insert("a.txt")
+
+    readers = [db._reader()]
+    worker = threading.Thread(target=lambda: readers.append(db._reader()))
+    worker.start()
+    worker.join()
+    stream = db.iter_rows("SELECT path_rel FROM files")
+    assert next(stream)["path_rel"] == "a.txt"
+
+    db.close()
+    for conn in readers + [db.conn]:
+        with pytest.raises(avdb.sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    with pytest.raises(avdb.sqlite3.ProgrammingError):
+        next(stream)
+
+
+def test_in_memory_database_reads_through_the_writer(tmp_path, dirs):
+    """An in-memory database is not reopened as a separate, empty reader."""
+
+    config_path = tmp_path / "memory.cfg"
+    config_path.write_text(json.dumps({"db_path": ":memory:"}), encoding="utf-8")
+    db = AgentVectorDB(config_path=str(config_path))
+    db.reset_db(str(dirs.base))
+    db.insert("a.txt")
+
+    assert db._reader() is db.conn
+    assert db.fetch_one("SELECT path_rel FROM files")["path_rel"] == "a.txt"
+    assert [r["path_rel"] for r in db.iter_rows("SELECT path_rel FROM files")] == ["a.txt"]
+    db.close()
+
+
+def test_insert_many_skips_existing_and_unsupported(tmp_path, dirs):
+    """Batch inserts ignore duplicates and disallowed extensions."""
+
+    config_path = tmp_path / "batch.cfg"
+    db = AgentVectorDB(config_path=str(config_path))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+    db.insert("a.txt")
+
+    res = db.insert_many(["a.txt", "./b.md", "sub\\c.txt", "d.zip"])
+    assert res == {"ok": True, "inserted": 2, "skipped": 1}
+    paths = {r["path_rel"] for r in db.conn.execute("SELECT path_rel FROM files")}
+    assert paths == {"a.txt", "b.md", "sub/c.txt"}
+
+    again = db.insert_many(["a.txt", "e.txt"], with_ids=True)
+    assert again["inserted"] == 1
+    assert again["ids"] == {"a.txt": db.get_file_id("a.txt")["id"], "e.txt": db.get_file_id("e.txt")["id"]}
+
+
+def test_append_cluster_notes_to_many_ids(tmp_path, dirs):
+    """Notes append to every known id once; unknown ids are ignored."""
+
+    config_path = tmp_path / "notes.cfg"
+    db = AgentVectorDB(config_path=str(config_path))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+    a = db.insert("a.txt")["id"]
+    b = db.insert("b.txt")["id"]
+    db.append_organization_cluser_notes([a], "first")
+
+    res = db.append_organization_cluser_notes([b, a, 999, b], "shared")
+    assert res == {"ok": True, "updated_ids": [b, a]}
+
+    notes_a = db.get_organization_notes("a.txt")["organization_notes"].splitlines()
+    notes_b = db.get_organization_notes("b.txt")["organization_notes"].splitlines()
+    assert [line.split("]", 1)[1] for line in notes_a] == ["first", "shared"]
+    assert [line.split("]", 1)[1] for line in notes_b] == ["shared"]
+    count = db.conn.execute("SELECT COUNT(*) AS c FROM vec_org_notes").fetchone()["c"]
+    assert count == 2
+
+
+def test_append_cluster_notes_is_atomic_with_embedding(tmp_path, dirs, monkeypatch):
+    db = AgentVectorDB(config_path=str(tmp_path / "atomic.cfg"))
+    db.reset_db(str(dirs.base))
+    file_id = db.insert("a.txt")["id"]
+    with db.conn:
+        db.conn.execute("UPDATE files SET organization_notes='old' WHERE id=?", (file_id,))
+
+    def _boom(texts):
+        raise RuntimeError("embedder down")
+
+    monkeypatch.setattr(db, "_embed_docs", _boom)
+    assert not db.append_organization_cluser_notes([file_id], "lost")["ok"]
+    assert db.get_organization_notes("a.txt")["organization_notes"] == "old"
+
+    monkeypatch.undo()
+    assert db.append_organization_cluser_notes([file_id], "kept")["ok"]
+    notes = db.get_organization_notes("a.txt")["organization_notes"]
+    assert notes.startswith("old\n[") and notes.endswith("]kept\n")
+
+
+def test_append_cluster_notes_embeds_outside_the_write(tmp_path, dirs, monkeypatch):
+    """Embedding holds no write lock, and a concurrent edit is not lost."""
+
+    db = AgentVectorDB(config_path=str(tmp_path / "embed_first.cfg"))
+    db.reset_db(str(dirs.base))
+    file_id = db.insert("a.txt")["id"]
+
+    embed_docs = db._embed_docs
+    calls = []
+
+    def embed_then_interfere(texts):
+        calls.append(db.conn.in_transaction)
+        if len(calls) == 1:
+            other = sqlite3.connect(db.config["db_path"])
+            with other:
+                other.execute("UPDATE files SET organization_notes='edited\n' WHERE id=?", (file_id,))
+            other.close()
+        return embed_docs(texts)
+
+    monkeypatch.setattr(db, "_embed_docs", embed_then_interfere)
+    assert db.append_organization_cluser_notes([file_id], "appended")["ok"]
+
+    assert calls == [False, False]
+    notes = db.get_organization_notes("a.txt")["organization_notes"]
+    assert notes.startswith("edited\n[") and notes.endswith("]appended\n")
+    count = db.conn.execute("SELECT COUNT(*) AS c FROM vec_org_notes").fetchone()["c"]
+    assert count == 1
+
+
+def test_set_selected_by_ids_binds_id_list(tmp_path, dirs):
+    """Selection updates accept any number of ids through a single parameter."""
+
+    db = AgentVectorDB(config_path=str(tmp_path / "sel.cfg"))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+    db.insert_many([f"f{i}.txt" for i in range(5)])
+    ids = [row["id"] for row in db.conn.execute("SELECT id FROM files ORDER BY id")]
+
+    assert db.set_selected_by_ids(ids[:3] + [999], False)["updated"] == 3
+    assert db.set_selected_by_ids(ids[:1], True)["updated"] == 1
+    selected = [row["selected"] for row in db.conn.execute("SELECT selected FROM files ORDER BY id")]
+    assert selected == [1, 0, 0, 1, 1]
+
+
+def test_connection_pragmas_follow_config(tmp_path):
+    """Writer and reader connections apply the configured PRAGMAs."""
+
+    config_path = tmp_path / "pragma.cfg"
+    config_path.write_text(json.dumps({"sqlite": {"mmap_size_mb": 8, "cache_size_mb": 2}}))
+    db = AgentVectorDB(config_path=str(config_path))
+
+    for conn in (db.conn, db._reader()):
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 8 * 1024 * 1024
+
+
+def test_writer_connection_is_usable_from_other_threads(tmp_path, dirs):
+    """The shared writer connection is opened with ``check_same_thread=False``."""
+
+    db = AgentVectorDB(config_path=str(tmp_path / "threads.cfg"))
+    db.reset_db(str(dirs.base))
+    results = []
+    worker = threading.Thread(target=lambda: results.append(db.insert("a.txt")))
+    worker.start()
+    worker.join()
+
+    assert results[0]["ok"]
+    assert db.get_file_id("a.txt")["id"] == results[0]["id"]
+
+
+def test_next_path_lookups_use_partial_indexes(tmp_path, dirs):
+    """Each work-queue lookup is served by its partial index."""
+
+    db = AgentVectorDB(config_path=str(tmp_path / "queue.cfg"))
+    base_dir = dirs.base
+    db.reset_db(str(base_dir))
+
+    for index_name, where in avdb._PENDING_FILTERS.items():
+        plan = db.conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT path_rel FROM files WHERE {where} ORDER BY id ASC LIMIT 1"
+        ).fetchall()
+        assert any(index_name in row["detail"] for row in plan), (index_name, plan)
+
+
+def test_legacy_schema_is_migrated_on_open(tmp_path, dirs):
+    """Databases created before ``selected``/``planner_processed`` still open."""
+
+    db_path = tmp_path / "legacy.sqlite"
+    legacy = sqlite3.connect(str(db_path))
+    legacy.executescript(
+        """
+        CREATE TABLE files(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          path_rel TEXT NOT NULL UNIQUE,
+          file_report TEXT,
+          organization_notes TEXT,
+          planned_dest TEXT,
+          final_dest TEXT,
+          log TEXT,
+          created_at TEXT NOT NULL,
+          updated_at TEXT NOT NULL
+        );
+        INSERT INTO files(path_rel, created_at, updated_at) VALUES('old.txt', 'then', 'then');
+        """
+    )
+    legacy.commit()
+    legacy.close()
+    config_path = tmp_path / "legacy.cfg"
+    config_path.write_text(json.dumps({"db_path": str(db_path)}), encoding="utf-8")
+
+    db = AgentVectorDB(config_path=str(config_path))
+
+    row = db.fetch_one("SELECT selected, planner_processed FROM files WHERE path_rel='old.txt'")
+    assert (row["selected"], row["planner_processed"]) == (1, 0)
+    indexes = {r["name"] for r in db.conn.execute("PRAGMA index_list(files)")}
+    assert set(avdb._PENDING_FILTERS) <= indexes
+    db.close()
+
+
+def test_embedding_cache_keys_without_xxhash(monkeypatch):
+    monkeypatch.setattr(avdb, "xxhash", None)
+    cache = avdb.EmbeddingCache(maxsize=2)
+    cache.put("report", np.ones(2, dtype=np.float32))
+
+    assert cache.get("report") is not None
+    assert cache.get("other") is None
+    assert len(avdb.EmbeddingCache._key("report")) == 16
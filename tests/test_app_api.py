@@ -2,23 +2,18 @@
 
 from __future__ import annotations
 
-import importlib
+import json
+import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
-
-class FakeEmbedder:  # pragma: no cover - simple stand-in
-    """Lightweight embedding stub used by the tests."""
-
-    def __init__(self, model_name: str | None = None):
-        self.model_name = model_name
-
-    def embed(self, texts: list[str]) -> list[list[float]]:
-        return [[0.0] * 3 for _ in texts]
+from fakes import TEST_DB_CONFIG, ZeroEmbedder
 
 
 @dataclass
@@ -32,40 +27,40 @@ class AppHarness:
     target_dir: Path
 
 
-@pytest.fixture
-def app_harness(tmp_path, monkeypatch) -> AppHarness:
-    """Return an :class:`AppHarness` with isolated storage for each test."""
+@pytest.fixture(scope="module")
+def app_client():
+    """Import the app once per module with the embedder patched."""
 
     import agent_utils.agent_vector_db as avdb
 
-    monkeypatch.setattr(avdb, "TextEmbedding", FakeEmbedder)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(avdb, "TextEmbedding", ZeroEmbedder)
 
-    original_connect = avdb.sqlite3.connect
+        import foldermate.app as app_module
 
-    def _connect(*args, **kwargs):
-        kwargs.setdefault("check_same_thread", False)
-        return original_connect(*args, **kwargs)
+        with TestClient(app_module.app) as client:
+            yield app_module, client
 
-    monkeypatch.setattr(avdb.sqlite3, "connect", _connect)
 
-    import foldermate.app as app_module
+@pytest.fixture
+def app_harness(app_client, dirs, monkeypatch) -> AppHarness:
+    """Return an :class:`AppHarness` with isolated storage for each test."""
 
-    importlib.reload(app_module)
+    app_module, client = app_client
 
-    config_path = tmp_path / "config.json"
-    new_db = app_module.AgentVectorDB(config_path=str(config_path))
+    dirs.config.write_text(json.dumps(TEST_DB_CONFIG), encoding="utf-8")
+    new_db = app_module.AgentVectorDB(config_path=str(dirs.config))
 
-    base_dir = tmp_path / "base"
-    base_dir.mkdir()
+    base_dir = dirs.base
     new_db.reset_db(str(base_dir))
 
-    target_dir = tmp_path / "target"
-    target_dir.mkdir()
+    target_dir = dirs.target
     new_db.save_config(target_dir=str(target_dir), dont_delete=False)
 
-    monkeypatch.setattr(app_module, "db", new_db)
-
-    with TestClient(app_module.app) as client:
+    previous_db = app_module.db
+    app_module.set_db(new_db)
+    monkeypatch.setattr(app_module, "runstate", app_module.RunState())
+    try:
         yield AppHarness(
             module=app_module,
             client=client,
@@ -73,6 +68,9 @@ def app_harness(tmp_path, monkeypatch) -> AppHarness:
             base_dir=base_dir,
             target_dir=target_dir,
         )
+    finally:
+        app_module.set_db(previous_db)
+        new_db.close()
 
 
 def _get_final_dest(db, path_rel: str) -> str:
@@ -104,6 +102,42 @@ def test_config_endpoints_roundtrip(app_harness: AppHarness):
     assert update["config"]["dont_delete"] is True
 
 
+def test_config_update_writes_once(app_harness: AppHarness, monkeypatch):
+    """A multi-field ``PUT /api/config`` saves all fields in one write."""
+
+    db = app_harness.db
+    calls = []
+    original = db.save_config
+    monkeypatch.setattr(db, "save_config", lambda **kw: calls.append(kw) or original(**kw))
+
+    payload = {"base_dir": "", "instructions": "Keep receipts", "recursive": False}
+    update = app_harness.client.put("/api/config", json=payload).json()
+
+    assert calls == [{"instructions": "Keep receipts", "recursive": False}]
+    assert update["base_dir"] == str(app_harness.base_dir)
+    stored = json.loads(Path(db.config_path).read_text(encoding="utf-8"))
+    assert stored["recursive"] is False
+    assert not Path(f"{db.config_path}.tmp").exists()
+
+
+def test_config_update_ignores_null_fields(app_harness: AppHarness):
+    """Fields sent as ``null`` keep their stored values."""
+
+    client = app_harness.client
+    db = app_harness.db
+    client.put("/api/config", json={"instructions": "Keep receipts", "recursive": False})
+
+    update = client.put(
+        "/api/config", json={"instructions": None, "recursive": None, "dont_delete": True}
+    ).json()
+
+    assert update["config"]["instructions"] == "Keep receipts"
+    assert update["config"]["recursive"] is False
+    assert db.get_instructions()["instructions"] == "Keep receipts"
+    stored = json.loads(Path(db.config_path).read_text(encoding="utf-8"))
+    assert stored["recursive"] is False
+
+
 def test_insert_and_list_files(app_harness: AppHarness):
     """Inserted files should appear in the paginated listing."""
 
@@ -180,38 +214,31 @@ def test_selection_endpoints_and_persistence(app_harness: AppHarness):
 
     client = app_harness.client
 
-    first = client.post("/api/files", json={"path_rel": "first.txt"}).json()
-    second = client.post("/api/files", json={"path_rel": "second.txt"}).json()
+    ids = app_harness.db.insert_many(["first.txt", "second.txt"], with_ids=True)["ids"]
 
     resp = client.put(
-        f"/api/files/{first['id']}/selected",
+        f"/api/files/{ids['first.txt']}/selected",
         json={"selected": False},
     ).json()
     assert resp["selected"] is False
-
-    listing = client.get("/api/files", params={"order_by": "path_rel", "order_dir": "asc"}).json()
-    rows = {row["path_rel"]: row for row in listing["rows"]}
-    assert rows["first.txt"]["selected"] is False
-    assert rows["second.txt"]["selected"] is True
+    assert resp["path_rel"] == "first.txt"
 
     bulk = client.post(
         "/api/files/selection",
-        json={"ids": [second["id"]], "selected": False},
+        json={"ids": [ids["second.txt"], 999], "selected": False},
     ).json()
     assert bulk["updated"] == 1
-
-    listing = client.get("/api/files", params={"order_by": "path_rel", "order_dir": "asc"}).json()
-    rows = {row["path_rel"]: row for row in listing["rows"]}
-    assert rows["first.txt"]["selected"] is False
-    assert rows["second.txt"]["selected"] is False
+    assert bulk["updated_ids"] == [ids["second.txt"]]
+    assert bulk["selected"] is False
 
     all_resp = client.post(
         "/api/files/selection/all",
         json={"selected": True},
     ).json()
-    assert all_resp["updated"] == listing["total"]
+    assert all_resp["updated"] == len(ids)
 
     listing = client.get("/api/files", params={"order_by": "path_rel", "order_dir": "asc"}).json()
+    assert [row["path_rel"] for row in listing["rows"]] == ["first.txt", "second.txt"]
     assert all(row["selected"] for row in listing["rows"])
 
 
@@ -272,12 +299,13 @@ def test_move_pending_files_moves_and_deletes_source(app_harness: AppHarness):
     db.insert("a.txt")
     db.set_planned_destination("a.txt", "organized/a.txt")
 
-    module._move_pending_files(str(base_dir), str(target_dir), dont_delete=False)
+    target_dir_s = str(target_dir)
+    module._move_pending_files(str(base_dir), target_dir_s, dont_delete=False)
 
-    dest = target_dir / "organized/a.txt"
-    assert dest.exists()
+    dest = os.path.join(target_dir_s, "organized", "a.txt")
+    assert os.path.exists(dest)
     assert not source.exists()
-    assert _get_final_dest(db, "a.txt") == str(dest)
+    assert _get_final_dest(db, "a.txt") == dest
 
 
 def test_move_pending_files_respects_dont_delete(app_harness: AppHarness):
@@ -294,12 +322,13 @@ def test_move_pending_files_respects_dont_delete(app_harness: AppHarness):
     db.insert("b.txt")
     db.set_planned_destination("b.txt", "organized/b.txt")
 
-    module._move_pending_files(str(base_dir), str(target_dir), dont_delete=True)
+    target_dir_s = str(target_dir)
+    module._move_pending_files(str(base_dir), target_dir_s, dont_delete=True)
 
-    dest = target_dir / "organized/b.txt"
-    assert dest.exists()
+    dest = os.path.join(target_dir_s, "organized", "b.txt")
+    assert os.path.exists(dest)
     assert source.exists()
-    assert _get_final_dest(db, "b.txt") == str(dest)
+    assert _get_final_dest(db, "b.txt") == dest
 
 
 def test_move_pending_files_rejects_invalid_destination(app_harness: AppHarness):
@@ -378,14 +407,315 @@ def test_move_action_updates_organized_path_fields(app_harness: AppHarness):
 
     db.set_planned_destination("f.txt", "organized/f.txt")
 
-    module._move_pending_files(str(base_dir), str(target_dir), dont_delete=True)
+    target_dir_s = str(target_dir)
+    module._move_pending_files(str(base_dir), target_dir_s, dont_delete=True)
 
-    destination = target_dir / "organized/f.txt"
+    destination = os.path.join(target_dir_s, "organized", "f.txt")
 
     listing = client.get("/api/files", params={"page_size": 10}).json()
     row = next(r for r in listing["rows"] if r["id"] == file_id)
-    assert row["organized_path"] == str(destination)
+    assert row["organized_path"] == destination
 
     detail = client.get(f"/api/files/{file_id}").json()
-    assert detail["organized_path"] == str(destination)
+    assert detail["organized_path"] == destination
+
+
+
+def test_runstate_snapshots_and_conflicts(app_harness: AppHarness):
+    """Run state changes replace the snapshot and block competing actions."""
+
+    runstate = app_harness.module.RunState()
+    idle = runstate.snapshot()
+
+    runstate.start("analyze")
+    running = runstate.snapshot()
+    assert running.current_action == "analyze"
+    assert running.status_text == "File analysis in progress…"
+    assert idle.current_action is None
+
+    runstate.status_text = "Analyzing a.txt"
+    assert runstate.status_text == "Analyzing a.txt"
+    assert running.status_text == "File analysis in progress…"
+
+    with pytest.raises(RuntimeError):
+        runstate.start("plan")
+
+    runstate.stop()
+    assert runstate.current_action is None
+    assert runstate.cancel_event.is_set()
+
+
+def test_list_files_cursor_pagination(app_harness: AppHarness):
+    """Following ``next_cursor`` visits every row once, in order."""
+
+    client = app_harness.client
+    for name in ("a.txt", "b.txt", "c.txt", "d.txt", "e.txt"):
+        client.post("/api/files", json={"path_rel": name})
+
+    params = {"page_size": 2, "order_by": "path_rel", "order_dir": "asc"}
+    seen = []
+    cursor = None
+    while True:
+        query = {**params, "cursor": cursor} if cursor else params
+        page = client.get("/api/files", params=query).json()
+        assert page["total"] == 5
+        seen.extend(row["path_rel"] for row in page["rows"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ["a.txt", "b.txt", "c.txt", "d.txt", "e.txt"]
+
+    first_cursor = client.get("/api/files", params=params).json()["next_cursor"]
+    mismatched = client.get("/api/files", params={"cursor": first_cursor})
+    assert mismatched.status_code == 400
+    assert client.get("/api/files", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_unfiltered_listing_keeps_its_index_seek(app_harness: AppHarness, monkeypatch):
+    """Only searches without a cursor count matches with a window function."""
+
+    client = app_harness.client
+    db = app_harness.db
+    for name in ("a.txt", "b.txt", "c.txt"):
+        client.post("/api/files", json={"path_rel": name})
+
+    queries = []
+    fetch_all = db.fetch_all
+
+    def recording_fetch_all(sql, params=()):
+        queries.append(sql)
+        return fetch_all(sql, params)
+
+    monkeypatch.setattr(db, "fetch_all", recording_fetch_all)
+
+    assert client.get("/api/files", params={"page_size": 2}).json()["total"] == 3
+    plan = db.conn.execute("EXPLAIN QUERY PLAN " + queries[-1], {"limit": 2, "offset": 0})
+    assert "OVER" not in queries[-1]
+    assert not any("TEMP B-TREE" in row["detail"] for row in plan)
+
+    assert client.get("/api/files", params={"q": "txt"}).json()["total"] == 3
+    assert "OVER" in queries[-1]
+
+
+def test_list_files_search_matches_substrings(app_harness: AppHarness):
+    """Searches match substrings case-insensitively across text columns."""
+
+    client = app_harness.client
+    db = app_harness.db
+    for name in ("Invoices/march.pdf", "notes/todo.txt", "ab.txt"):
+        client.post("/api/files", json={"path_rel": name})
+    db.set_file_report("notes/todo.txt", "Quarterly INVOICE follow-ups")
+    db.set_planned_destination("ab.txt", "misc/ab.txt")
 
+    def search(q):
+        params = {"q": q, "order_by": "path_rel", "order_dir": "asc"}
+        listing = client.get("/api/files", params=params)
+        return [row["path_rel"] for row in listing.json()["rows"]]
+
+    assert search("invoice") == ["Invoices/march.pdf", "notes/todo.txt"]
+    assert search("arch") == ["Invoices/march.pdf"]
+    assert search("misc/") == ["ab.txt"]
+    assert search("ab") == ["ab.txt"]
+
+    db.set_file_report("notes/todo.txt", "groceries")
+    assert search("invoice") == ["Invoices/march.pdf"]
+
+
+def test_list_files_total_past_last_page(app_harness: AppHarness):
+    """The total is reported even when the requested page is empty."""
+
+    client = app_harness.client
+    for name in ("a.txt", "b.txt", "c.txt"):
+        client.post("/api/files", json={"path_rel": name})
+
+    first = client.get("/api/files", params={"page_size": 2}).json()
+    beyond = client.get("/api/files", params={"page_size": 2, "page": 5}).json()
+    assert first["total"] == beyond["total"] == 3
+    assert beyond["rows"] == []
+
+
+def test_preview_keeps_first_line_only(app_harness: AppHarness):
+    """Previews stop at the first line break and cap the length."""
+
+    preview = app_harness.module._preview
+    assert preview(None) is None
+    assert preview("") is None
+    assert preview("first\r\nsecond") == "first"
+    for text in ("a\rb", "a\x0bb", "a\x0cb", "a\x1cb", "a\x85b", "a\u2028b", "a\u2029b"):
+        assert preview(text) == text.splitlines()[0] == "a"
+    assert preview("only") == "only"
+    assert preview("x" * 200, n=10) == "x" * 9 + "…"
+
+
+def test_list_files_previews_and_flags(app_harness: AppHarness):
+    """Listings expose first-line previews and report/notes flags."""
+
+    client = app_harness.client
+    db = app_harness.db
+    client.post("/api/files", json={"path_rel": "done.txt"})
+    client.post("/api/files", json={"path_rel": "busy.txt"})
+    client.post("/api/files", json={"path_rel": "new.txt"})
+    db.set_file_report("done.txt", "# Summary\n" + "body " * 500)
+    db.set_file_report("busy.txt", app_harness.module.PROCESSING_SENTINELS[0])
+    db.append_organization_anchor_notes("done.txt", "keep with invoices")
+
+    params = {"order_by": "path_rel", "order_dir": "asc"}
+    listing = client.get("/api/files", params=params).json()
+    rows = {row["path_rel"]: row for row in listing["rows"]}
+
+    assert rows["done.txt"]["file_report_preview"] == "# Summary"
+    assert rows["done.txt"]["has_file_report"] is True
+    assert rows["done.txt"]["has_organization_notes"] is True
+    assert rows["done.txt"]["organization_notes_preview"].endswith("keep with invoices")
+    assert rows["busy.txt"]["has_file_report"] is False
+    assert rows["new.txt"]["has_file_report"] is False
+    assert rows["new.txt"]["file_report_preview"] is None
+    assert rows["new.txt"]["has_organization_notes"] is False
+
+
+def test_list_files_cache_follows_database_writes(app_harness: AppHarness):
+    """Cached listings are reused until any write reaches the database."""
+
+    module = app_harness.module
+    client = app_harness.client
+    db = app_harness.db
+    client.post("/api/files", json={"path_rel": "a.txt"})
+
+    first = client.get("/api/files").json()
+    version = module._data_version()
+    cached = module._response_cache.get(
+        ("files", None, 1, 50, "updated_at", "desc", None), version
+    )
+    assert cached is not None and json.loads(cached)["total"] == 1
+
+    # Writes made outside the API, e.g. by background workers, still count.
+    db.insert("b.txt")
+    assert module._data_version() != version
+    second = client.get("/api/files").json()
+    assert second["total"] == 2
+    assert first["total"] == 1
+
+    # So do commits from another connection, like the agents' shared instance.
+    version = module._data_version()
+    other = module.AgentVectorDB(config_path=db.config_path)
+    other.insert("c.txt")
+    other.close()
+    assert module._data_version() != version
+    assert client.get("/api/files").json()["total"] == 3
+
+    # A write in progress, e.g. embedding a batch, does not hold up listings.
+    writing, done = threading.Event(), threading.Event()
+
+    def long_write():
+        with db._lock:
+            writing.set()
+            done.wait(5)
+
+    writer = threading.Thread(target=long_write)
+    writer.start()
+    writing.wait(5)
+    try:
+        assert module._data_version() is None
+        assert client.get("/api/files").json()["total"] == 3
+    finally:
+        done.set()
+        writer.join()
+
+    status_a = module.status()
+    assert module.status() is status_a
+    module.runstate.status_text = "Busy"
+    assert module.status()["status_text"] == "Busy"
+
+
+def test_listing_rows_pass_strict_validation(app_harness: AppHarness):
+    """Listing rows built from the database pass strict model validation."""
+
+    module = app_harness.module
+    db = app_harness.db
+    db.insert("a.txt")
+    db.set_file_report("a.txt", "line one\nline two")
+
+    row = db.fetch_one(f"SELECT {module.LIST_COLUMNS_SQL} FROM files")
+    fields = module._row_to_file_dict(row)
+    validated = module.FileRow.model_validate(fields, strict=True)
+    assert validated.model_dump() == fields
+    assert set(fields) == set(module.FileRow.model_fields)
+
+
+def test_list_files_schema_documents_rows(app_harness: AppHarness):
+    """``/api/files`` keeps its documented response model."""
+
+    schema = app_harness.client.get("/openapi.json").json()
+    response = schema["paths"]["/api/files"]["get"]["responses"]["200"]
+    ref = response["content"]["application/json"]["schema"]["$ref"]
+    assert ref.endswith("/FilesListOut")
+
+
+def test_large_listings_are_gzipped(app_harness: AppHarness):
+    """Large responses are compressed when the client accepts gzip."""
+
+    client = app_harness.client
+    for index in range(30):
+        client.post("/api/files", json={"path_rel": f"folder/document_{index:03d}.txt"})
+
+    headers = {"Accept-Encoding": "gzip"}
+    listing = client.get("/api/files", params={"page_size": 30}, headers=headers)
+    assert listing.headers["content-encoding"] == "gzip"
+    assert listing.json()["total"] == 30
+
+    small = client.get("/api/status", headers=headers)
+    assert "content-encoding" not in small.headers
+
+
+def test_file_endpoints_return_404_for_unknown_ids(app_harness: AppHarness):
+    """Id-addressed endpoints report missing files as 404."""
+
+    client = app_harness.client
+    planned = client.put("/api/files/999/planned_dest", json={"planned_dest": "a/b.txt"})
+    assert planned.status_code == 404
+    assert client.put("/api/files/999/selected", json={"selected": False}).status_code == 404
+    assert client.put("/api/files/999/file_report", json={"file_report": "x"}).status_code == 404
+    assert client.get("/api/files/999/report").status_code == 404
+    assert client.get("/api/files/999/similar").status_code == 404
+
+    bug = {"ok": False, "error": "'embedding_dim'", "error_type": "KeyError"}
+    with pytest.raises(HTTPException) as raised:
+        app_harness.module._found_or_404(bug)
+    assert raised.value.status_code == 500
+
+    file_id = client.post("/api/files", json={"path_rel": "a.txt"}).json()["id"]
+    saved = client.put(f"/api/files/{file_id}/file_report", json={"file_report": "alpha"}).json()
+    assert saved == {"ok": True, "id": file_id, "path_rel": "a.txt"}
+    assert client.get(f"/api/files/{file_id}/report").json()["file_report"] == "alpha"
+    similar = client.get(f"/api/files/{file_id}/similar").json()
+    assert [row["id"] for row in similar["results"]] == [file_id]
+    selected = client.put(f"/api/files/{file_id}/selected", json={"selected": False}).json()
+    assert selected == {"ok": True, "path_rel": "a.txt", "selected": False}
+
+
+def test_stream_files_as_ndjson(app_harness: AppHarness):
+    """``/api/files/stream`` emits one JSON object per matching row."""
+
+    client = app_harness.client
+    db = app_harness.db
+    for name in ("b.txt", "a.txt", "c.md"):
+        client.post("/api/files", json={"path_rel": name})
+    db.set_file_report("a.txt", "full report\nwith several lines")
+
+    resp = client.get("/api/files/stream")
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["path_rel"] for row in rows] == ["a.txt", "b.txt", "c.md"]
+    assert rows[0]["file_report"] == "full report\nwith several lines"
+    assert rows[0]["selected"] is True
+
+    filtered = client.get("/api/files/stream", params={"q": ".md"}).text.splitlines()
+    assert [json.loads(line)["path_rel"] for line in filtered] == ["c.md"]
+
+
+def test_harness_database_skips_fsync(app_harness: AppHarness):
+    """The test configuration turns off synchronous commits."""
+
+    db = app_harness.db
+    assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
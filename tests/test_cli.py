@@ -0,0 +1,63 @@
+"""Tests for the FolderMate command-line entrypoint."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from foldermate import cli
+
+
+def test_main_passes_server_options(tmp_path, monkeypatch):
+    """CLI flags are forwarded to :func:`uvicorn.run`."""
+
+    config_path = tmp_path / "organizer.config.json"
+    config_path.write_text(json.dumps({"base_dir": str(tmp_path)}), encoding="utf-8")
+    calls = []
+    monkeypatch.setattr(cli.uvicorn, "run", lambda app, **kwargs: calls.append((app, kwargs)))
+
+    cli.main(["--config", str(config_path), "--workers", "3", "--log-level", "warning"])
+
+    assert calls == [
+        (
+            "foldermate.app:app",
+            {
+                "host": cli.DEFAULT_HOST,
+                "port": cli.DEFAULT_PORT,
+                "workers": 3,
+                "reload": False,
+                "log_level": "warning",
+            },
+        )
+    ]
+
+
+def test_main_rejects_reload_with_workers(tmp_path, monkeypatch):
+    """Reload mode is single-process, so extra workers are refused."""
+
+    config_path = tmp_path / "organizer.config.json"
+    config_path.write_text("{}", encoding="utf-8")
+    monkeypatch.setattr(cli.uvicorn, "run", lambda *args, **kwargs: None)
+
+    with pytest.raises(SystemExit):
+        cli.main(["--config", str(config_path), "--reload", "--workers", "2"])
+
+
+def test_load_config_reports_invalid_json(tmp_path):
+    """Malformed configuration files exit with a readable message."""
+
+    config_path = tmp_path / "organizer.config.json"
+    config_path.write_text('{"base_dir": ', encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="Invalid JSON"):
+        cli.load_config(config_path)
+
+
+def test_load_config_reads_utf8(tmp_path):
+    """Configuration is parsed from raw bytes, including non-ASCII paths."""
+
+    config_path = tmp_path / "organizer.config.json"
+    config_path.write_text(json.dumps({"base_dir": "/tmp/Überordner"}), encoding="utf-8")
+
+    assert cli.load_config(config_path) == {"base_dir": "/tmp/Überordner"}
@@ -1,59 +1,32 @@
 """Tests for config persistence and reset behaviour."""
 
-import importlib
-from fastapi.testclient import TestClient  # pylint: disable=import-error
-
-
-class FakeEmbedder:  # pylint: disable=too-few-public-methods
-    """Minimal fake embedder for tests."""
-
-    def __init__(self, model_name: str | None = None) -> None:
-        """Ignore the model name."""
-
-        _ = model_name  # unused
-
-    def embed(self, texts):
-        """Return zero vectors matching input length."""
-
-        return [[0.0]] * len(list(texts))
+import hashlib
+import json
 
+from fastapi.testclient import TestClient  # pylint: disable=import-error
 
-def _prepare_agent_db(monkeypatch):
-    """Monkeypatch expensive dependencies and return the agent module."""
-
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
-
-    import agent_utils.agent_vector_db as avdb  # pylint: disable=import-outside-toplevel
+from fakes import TEST_DB_CONFIG
 
-    orig_connect = avdb.sqlite3.connect
 
-    def _connect(*args, **kwargs):
-        kwargs.setdefault("check_same_thread", False)
-        return orig_connect(*args, **kwargs)
+def _digest(path) -> bytes:
+    """Return a short BLAKE2b digest of the file at ``path``."""
 
-    monkeypatch.setattr(avdb.sqlite3, "connect", _connect)
-    return avdb
+    return hashlib.blake2b(path.read_bytes(), digest_size=8).digest()
 
 
-def test_config_persist(tmp_path, monkeypatch):
+def test_config_persist(tmp_path, dirs, app_module):
     """Ensure config values persist in SQLite and reset clears them."""
 
-    avdb = _prepare_agent_db(monkeypatch)
-
-    import foldermate.app as app_module  # pylint: disable=import-outside-toplevel
-    importlib.reload(app_module)
-
     db_path = tmp_path / "config.json"
+    db_path.write_text(json.dumps(TEST_DB_CONFIG), encoding="utf-8")
     new_db = app_module.AgentVectorDB(config_path=str(db_path))
-    base = tmp_path / "base"
-    base.mkdir()
+    base = dirs.base
     new_db.reset_db(str(base))
-    monkeypatch.setattr(app_module, "db", new_db)
+    app_module.set_db(new_db)
 
     client = TestClient(app_module.app)
 
-    dest = tmp_path / "dest"
-    dest.mkdir()
+    dest = dirs.target
     instr = "Keep PDFs in docs"
     resp = client.put(
         "/api/config",
@@ -77,19 +50,17 @@ def test_config_persist(tmp_path, monkeypatch):
     assert "instructions" not in data["config"]
 
 
-def test_reset_does_not_mutate_config_file(tmp_path, monkeypatch):
+def test_reset_does_not_mutate_config_file(tmp_path, dirs, app_module):
     """Resetting the database should leave the JSON config untouched."""
 
-    avdb = _prepare_agent_db(monkeypatch)
-
     config_path = tmp_path / "config.json"
-    db = avdb.AgentVectorDB(config_path=str(config_path))
-    before_bytes = config_path.read_bytes()
+    config_path.write_text(json.dumps(TEST_DB_CONFIG), encoding="utf-8")
+    db = app_module.AgentVectorDB(config_path=str(config_path))
+    before_digest = _digest(config_path)
     before_mtime = config_path.stat().st_mtime_ns
 
-    base = tmp_path / "base"
-    base.mkdir()
+    base = dirs.base
     db.reset_db(str(base))
 
-    assert config_path.read_bytes() == before_bytes
+    assert _digest(config_path) == before_digest
     assert config_path.stat().st_mtime_ns == before_mtime
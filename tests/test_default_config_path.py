@@ -4,6 +4,8 @@ from __future__ import annotations
 import importlib
 from pathlib import Path
 
+from agent_utils.db_singleton import clear_db_cache
+
 
 class DummyDB:
     """Simple stand-in for :class:`AgentVectorDB` recording the config path."""
@@ -19,22 +21,22 @@ def _root() -> Path:
 def test_planner_tools_default_config(monkeypatch):
     monkeypatch.delenv("FILE_ORGANIZER_CONFIG", raising=False)
     monkeypatch.setattr("agent_utils.agent_vector_db.AgentVectorDB", DummyDB)
+    clear_db_cache()
     planner_dir = _root() / "file_organization_planner_agent"
     monkeypatch.chdir(planner_dir)
-    tools = importlib.reload(
-        importlib.import_module("file_organization_planner_agent.agent_tools.tools")
-    )
+    tools = importlib.import_module("file_organization_planner_agent.agent_tools.tools")
     db = tools.get_db()
+    clear_db_cache()
     assert Path(db.config_path) == _root() / "organizer.config.json"
 
 
 def test_decider_tools_default_config(monkeypatch):
     monkeypatch.delenv("FILE_ORGANIZER_CONFIG", raising=False)
     monkeypatch.setattr("agent_utils.agent_vector_db.AgentVectorDB", DummyDB)
+    clear_db_cache()
     decider_dir = _root() / "file_organization_decider_agent"
     monkeypatch.chdir(decider_dir)
-    tools = importlib.reload(
-        importlib.import_module("file_organization_decider_agent.agent_tools.tools")
-    )
+    tools = importlib.import_module("file_organization_decider_agent.agent_tools.tools")
     db = tools.get_db()
+    clear_db_cache()
     assert Path(db.config_path) == _root() / "organizer.config.json"
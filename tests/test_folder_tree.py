@@ -0,0 +1,122 @@
+"""Tests for folder tree rendering and caching."""
+from __future__ import annotations
+
+import diskcache
+import pytest
+
+from agent_utils import folder_tree
+
+
+@pytest.fixture
+def tree_cache(tmp_path, monkeypatch):
+    cache = diskcache.Cache(str(tmp_path / "tree_cache"))
+    monkeypatch.setattr(folder_tree, "_cache", cache)
+    monkeypatch.setattr(folder_tree, "_memory_cache", folder_tree.OrderedDict())
+    yield cache
+    cache.close()
+
+
+def test_tree_lists_directories_first(tmp_path, tree_cache):
+    root = tmp_path / "root"
+    (root / "B" / "sub").mkdir(parents=True)
+    (root / "a").mkdir()
+    (root / "B" / "sub" / "deep.txt").write_text("")
+    (root / "Z.txt").write_text("")
+    (root / "b.md").write_text("")
+
+    tree = folder_tree.target_folder_tree(str(root))["tree"]
+
+    assert tree.splitlines() == [
+        f"Folder Tree for {root}:",
+        "├── a/",
+        "├── B/",
+        "│   └── sub/",
+        "│       └── deep.txt",
+        "├── b.md",
+        "└── Z.txt",
+    ]
+
+
+def test_tree_cache_tracks_root_changes(tmp_path, tree_cache):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_text("")
+
+    first = folder_tree.target_folder_tree(str(root))
+    assert len(tree_cache) == 1
+    assert folder_tree.target_folder_tree(str(root)) == first
+
+    (root / "b.txt").write_text("")
+    refreshed = folder_tree.target_folder_tree(str(root))
+    assert "b.txt" in refreshed["tree"]
+
+    uncached = folder_tree.target_folder_tree(str(root), use_cache=False)
+    assert uncached == refreshed
+
+
+def test_tree_lists_but_does_not_follow_directory_symlinks(tmp_path, tree_cache):
+    root = tmp_path / "root"
+    (root / "real").mkdir(parents=True)
+    (root / "real" / "inner.txt").write_text("")
+    (root / "link").symlink_to(root / "real", target_is_directory=True)
+
+    tree = folder_tree.target_folder_tree(str(root), use_cache=False)
+
+    assert tree["tree"].splitlines()[1:] == [
+        "├── link/",
+        "└── real/",
+        "    └── inner.txt",
+    ]
+    assert "errors" not in tree
+
+
+def test_unreadable_entries_are_reported_and_not_cached(tmp_path, tree_cache, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_text("")
+    broken_path = str(root / "broken")
+
+    class BrokenEntry:
+        name = "broken"
+        path = broken_path
+
+        def is_dir(self):
+            raise PermissionError(13, "Permission denied", broken_path)
+
+    real_scandir = folder_tree.os.scandir
+
+    class Listing:
+        def __init__(self, path):
+            self._it = real_scandir(path)
+            self._extra = [BrokenEntry()] if path == str(root) else []
+
+        def __enter__(self):
+            return iter([*self._it, *self._extra])
+
+        def __exit__(self, *exc_info):
+            self._it.close()
+
+    monkeypatch.setattr(folder_tree.os, "scandir", Listing)
+
+    tree = folder_tree.target_folder_tree(str(root))
+
+    assert tree["tree"].splitlines()[1:] == ["└── a.txt"]
+    assert tree["errors"] == [f"{broken_path}: [Errno 13] Permission denied: '{broken_path}'"]
+    assert len(tree_cache) == 0
+    assert not folder_tree._memory_cache
+
+
+def test_tree_memory_cache_skips_disk_cache(tmp_path, tree_cache, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_text("")
+
+    first = folder_tree.target_folder_tree(str(root))
+    tree_cache.clear()
+    assert folder_tree.target_folder_tree(str(root)) == first
+    assert len(tree_cache) == 0
+
+    monkeypatch.setattr(folder_tree, "TREE_CACHE_TTL_SECONDS", 0)
+    folder_tree._memory_cache.clear()
+    folder_tree.target_folder_tree(str(root))
+    assert folder_tree._memory_get(next(iter(folder_tree._memory_cache))) is None
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -10,6 +11,12 @@ def _root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
+def _list_logs(directory: Path) -> list[str]:
+    """Return the names of ``*.log`` files directly inside ``directory``."""
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(".log")]
+
+
 def test_planner_agent_logging_respects_config(tmp_path, monkeypatch):
     """Ensure logging honours the path in ``organizer.config.json``."""
     root = _root()
@@ -29,17 +36,25 @@ def test_planner_agent_logging_respects_config(tmp_path, monkeypatch):
             if name == "agent_utils" or name.startswith("agent_utils."):
                 sys.modules.pop(name, None)
 
+    # Modules imported elsewhere keep references to these, so put the same
+    # objects back afterwards rather than leaving fresh copies behind.
+    saved_modules = {
+        name: module
+        for name, module in sys.modules.items()
+        if name == "agent_utils" or name.startswith("agent_utils.")
+    }
+
     try:
         planner_dir = root / "file_organization_planner_agent"
         monkeypatch.chdir(planner_dir)
         _clear_agent_utils()
         import agent_utils  # pylint: disable=import-outside-toplevel
-        log_files = list(tmp_path.glob("*.log"))
-        assert log_files, "Logging did not write to configured directory"
-        assert not list(planner_dir.glob("*.log")), "Log file written to agent directory"
+        assert _list_logs(tmp_path), "Logging did not write to configured directory"
+        assert not _list_logs(planner_dir), "Log file written to agent directory"
     finally:
         if original is None:
             config_file.unlink(missing_ok=True)
         else:
             config_file.write_text(original)
         _clear_agent_utils()
+        sys.modules.update(saved_modules)
@@ -4,32 +4,14 @@ import os
 from agent_utils.agent_vector_db import AgentVectorDB
 
 
-class FakeEmbedder:
-    def __init__(self, model_name=None):
-        pass
-
-    def embed(self, texts):
-        vectors = []
-        for t in texts:
-            l = len(t)
-            s = sum(ord(c) for c in t)
-            vectors.append([float(l), float(s % 97), float((l * s) % 53)])
-        return vectors
-
-
-def test_planner_tools(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+def test_planner_tools(tmp_path, dirs, monkeypatch):
     cfg = tmp_path / "config.json"
     monkeypatch.setenv("FILE_ORGANIZER_CONFIG", str(cfg))
 
-    # Import tools after patching
-    planner_tools = importlib.reload(importlib.import_module(
-        "file_organization_planner_agent.agent_tools.tools"
-    ))
+    planner_tools = importlib.import_module("file_organization_planner_agent.agent_tools.tools")
 
     db: AgentVectorDB = planner_tools.get_db()
-    base = tmp_path / "base"
-    base.mkdir()
+    base = dirs.base
     db.reset_db(str(base))
 
     ins1 = db.insert("a.txt")
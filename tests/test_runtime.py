@@ -0,0 +1,42 @@
+"""Tests for optional event loop configuration."""
+from __future__ import annotations
+
+import json
+import sys
+import types
+
+from agent_utils import runtime
+
+
+def _write_config(tmp_path, **values):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(values), encoding="utf-8")
+    return config_path
+
+
+def test_event_loop_untouched_when_disabled(tmp_path, monkeypatch):
+    installed = []
+    monkeypatch.setattr(runtime.asyncio, "set_event_loop_policy", installed.append)
+    config_path = _write_config(tmp_path, use_uvloop=False)
+
+    assert runtime.configure_event_loop(config_path) is False
+    assert not installed
+
+
+def test_event_loop_installed_when_enabled(tmp_path, monkeypatch):
+    installed = []
+    fake_loop = types.ModuleType(runtime._loop_module_name())
+    fake_loop.EventLoopPolicy = object
+    monkeypatch.setitem(sys.modules, fake_loop.__name__, fake_loop)
+    monkeypatch.setattr(runtime.asyncio, "set_event_loop_policy", installed.append)
+    config_path = _write_config(tmp_path, use_uvloop=True)
+
+    assert runtime.configure_event_loop(config_path) is True
+    assert len(installed) == 1
+
+
+def test_event_loop_falls_back_when_package_missing(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, runtime._loop_module_name(), None)
+    config_path = _write_config(tmp_path, use_uvloop=True)
+
+    assert runtime.configure_event_loop(config_path) is False
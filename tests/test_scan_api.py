@@ -1,54 +1,115 @@
 from fastapi.testclient import TestClient
-import importlib
 
+from fakes import ZeroEmbedder
 
-class FakeEmbedder:
-    def __init__(self, model_name=None):
-        pass
 
-    def embed(self, texts):
-        return [[0.0]] * len(texts)
+def test_scan_populates_db(tmp_path, monkeypatch, app_module):
+    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", ZeroEmbedder)
 
+    db_path = tmp_path / "config.json"
+    new_db = app_module.AgentVectorDB(config_path=str(db_path))
+    new_db.reset_db(str(tmp_path / "base"))
+    app_module.set_db(new_db)
 
-def test_scan_populates_db(tmp_path, monkeypatch):
-    monkeypatch.setattr("agent_utils.agent_vector_db.TextEmbedding", FakeEmbedder)
+    base_dir = tmp_path / "src"
+    base_dir.mkdir()
+    (base_dir / "a.txt").write_text("a")
+    sub = base_dir / "sub"
+    sub.mkdir()
+    (sub / "b.txt").write_text("b")
 
-    import agent_utils.agent_vector_db as avdb
+    def scan(recursive):
+        # Call the scan body directly, as the route's background task does.
+        cancel_event = app_module.runstate.start("scan")
+        return app_module._do_scan(str(base_dir), recursive, cancel_event)
 
-    orig_connect = avdb.sqlite3.connect
+    def rows():
+        return new_db.conn.execute("SELECT path_rel, selected FROM files").fetchall()
 
-    def _connect(*args, **kwargs):
-        kwargs.setdefault("check_same_thread", False)
-        return orig_connect(*args, **kwargs)
+    assert scan(recursive=False) == {"inserted": 1, "skipped": 0}
+    assert [r["path_rel"] for r in rows()] == ["a.txt"]
 
-    monkeypatch.setattr(avdb.sqlite3, "connect", _connect)
+    assert scan(recursive=True) == {"inserted": 1, "skipped": 0}
+    assert sorted(r["path_rel"] for r in rows()) == ["a.txt", "sub/b.txt"]
+    assert all(r["selected"] for r in rows())
+    assert app_module.runstate.snapshot().current_action is None
 
-    import foldermate.app as app_module
-    importlib.reload(app_module)
 
-    db_path = tmp_path / "config.json"
-    new_db = app_module.AgentVectorDB(config_path=str(db_path))
+def test_scan_inserts_in_batches(tmp_path, monkeypatch, app_module):
+    new_db = app_module.AgentVectorDB(config_path=str(tmp_path / "config.json"))
     new_db.reset_db(str(tmp_path / "base"))
-    monkeypatch.setattr(app_module, "db", new_db)
-    client = TestClient(app_module.app)
+    app_module.set_db(new_db)
+    monkeypatch.setattr(app_module, "SCAN_BATCH_SIZE", 2)
+    batches = []
+    insert_many = new_db.insert_many
+    monkeypatch.setattr(new_db, "insert_many", lambda paths: batches.append(paths) or insert_many(paths))
 
     base_dir = tmp_path / "src"
     base_dir.mkdir()
-    (base_dir / "a.txt").write_text("a")
-    sub = base_dir / "sub"
-    sub.mkdir()
-    (sub / "b.txt").write_text("b")
+    for name in ("a.txt", "b.txt", "c.txt", "d.zip"):
+        (base_dir / name).write_text(name)
 
+    client = TestClient(app_module.app)
     resp = client.post("/api/actions/scan", json={"base_dir": str(base_dir), "recursive": False})
     assert resp.status_code == 200
-    data = client.get("/api/files").json()
-    paths = [r["path_rel"] for r in data["rows"]]
-    assert "a.txt" in paths and "sub/b.txt" not in paths
-    assert all(r["selected"] for r in data["rows"])
 
-    resp = client.post("/api/actions/scan", json={"base_dir": str(base_dir), "recursive": True})
-    assert resp.status_code == 200
-    data = client.get("/api/files").json()
-    paths = [r["path_rel"] for r in data["rows"]]
-    assert "sub/b.txt" in paths
-    assert all(r["selected"] for r in data["rows"])
+    assert sorted(len(batch) for batch in batches) == [2, 2]
+    paths = {row["path_rel"] for row in new_db.conn.execute("SELECT path_rel FROM files")}
+    assert paths == {"a.txt", "b.txt", "c.txt"}
+
+
+def test_cancelled_scan_leaves_the_next_action_alone(tmp_path, monkeypatch, app_module):
+    new_db = app_module.AgentVectorDB(config_path=str(tmp_path / "config.json"))
+    new_db.reset_db(str(tmp_path / "base"))
+    app_module.set_db(new_db)
+    monkeypatch.setattr(app_module, "SCAN_BATCH_SIZE", 1)
+    base_dir = tmp_path / "src"
+    base_dir.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (base_dir / name).write_text(name)
+
+    runstate = app_module.runstate
+    insert_many = new_db.insert_many
+
+    def cancel_and_start_plan(paths):
+        # The scan is cancelled and another action starts mid-batch.
+        result = insert_many(paths)
+        runstate.stop()
+        runstate.start("plan")
+        return result
+
+    monkeypatch.setattr(new_db, "insert_many", cancel_and_start_plan)
+    scan_event = runstate.start("scan")
+
+    assert app_module._do_scan(str(base_dir), False, scan_event)["inserted"] == 1
+    assert scan_event.is_set()
+    assert runstate.current_action == "plan"
+    assert not runstate.cancel_event.is_set()
+
+
+def test_failed_insert_stops_the_scan_and_reports_it(tmp_path, monkeypatch, app_module):
+    new_db = app_module.AgentVectorDB(config_path=str(tmp_path / "config.json"))
+    new_db.reset_db(str(tmp_path / "base"))
+    app_module.set_db(new_db)
+    base_dir = tmp_path / "src"
+    base_dir.mkdir()
+    (base_dir / "a.txt").write_text("a")
+
+    failure = {"ok": False, "error": "database is locked", "error_type": "OperationalError"}
+    monkeypatch.setattr(new_db, "insert_many", lambda paths: failure)
+    scan_event = app_module.runstate.start("scan")
+
+    assert app_module._do_scan(str(base_dir), False, scan_event) == {"inserted": 0, "skipped": 0}
+    assert app_module.runstate.current_action is None
+    assert app_module.runstate.status_text == "Scan failed: database is locked"
+
+
+def test_restarted_action_gets_a_fresh_cancel_event(app_module):
+    runstate = app_module.runstate
+    first = runstate.start("scan")
+    second = runstate.start("scan")
+
+    assert second is not first
+    assert first.is_set()
+    assert not second.is_set()
+    assert runstate.cancel_event is second
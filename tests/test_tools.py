@@ -1,5 +1,6 @@
 # dummy lines removed by editor bug workaround
 import os
+import re
 
 from file_analysis_agent.agent_tools import tools
 
@@ -27,3 +28,53 @@ def test_read_full_file():
     res = tools.read_full_file()
     assert "First line" in res["text"]
     assert res["token_count"] > 0
+
+
+def test_read_full_file_counts_tokens_once(monkeypatch):
+    from file_analysis_agent.agent_tools import analyzer as analyzer_module
+
+    tools.set(DATA_FILE)
+    first = tools.read_full_file()
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("token count should be reused")
+
+    monkeypatch.setattr(analyzer_module.tiktoken, "get_encoding", _fail)
+    assert tools.read_full_file() == first
+
+
+def test_line_slices_match_source_lines():
+    tools.set(DATA_FILE)
+    with open(DATA_FILE, encoding="utf-8") as handle:
+        lines = handle.read().splitlines()
+
+    assert tools.get_text_content_length() == len(lines)
+    assert tools.top(start_line=2, num_lines=3)["text"] == "\n".join(lines[1:4])
+    assert tools.tail(num_lines=1)["text"] == lines[-1]
+    past_end = tools.top(start_line=len(lines) + 1, num_lines=2)
+    assert past_end["text"] == ""
+
+
+def test_find_within_doc_reports_line_columns():
+    tools.set(DATA_FILE)
+
+    hits = tools.find_within_doc("line", flags="", max_hits=3)["hits"]
+    assert [(h["line"], h["start"], h["context"]) for h in hits] == [
+        (1, 7, "First line"),
+        (2, 8, "Second line"),
+        (3, 7, "Third line is here"),
+    ]
+    # Matches never span lines, even for patterns that can match "\n".
+    spaces = tools.find_within_doc(r"\s+", flags="")["hits"]
+    assert {h["match"] for h in spaces} == {" "}
+
+
+def test_find_within_doc_lookarounds_stay_on_their_line():
+    from file_analysis_agent.agent_tools.analyzer import analyzer
+
+    tools.set(DATA_FILE)
+    for regex in (r"line(?=\s+Third)", r"(?<!line\n)Third", r"line(?!\s)"):
+        pattern = re.compile(regex)
+        expected = [h.model_dump() for h in analyzer._find_per_line(pattern, 50)]
+        assert tools.find_within_doc(regex, flags="")["hits"] == expected
+    assert tools.find_within_doc(r"line(?=\s+Third)", flags="")["hits"] == []